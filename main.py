@@ -1,20 +1,49 @@
+import argparse
+import json
+import tempfile
 from src.utils import setup_logging, logger
-from src.partition import partition
-from src.summaries import summarize, image_summarize
-from src.vector_store import DocumentManager
+from src.partition import iter_partition
+from src.summaries import summarize, summarize_tables, image_summarize
+from src.vector_store import DocumentManager, DEFAULT_PERSIST_DIRECTORY
+from src.bundle import export_bundle, import_bundle, restore_vector_store
+from src.image_dedup import image_hash_index
 from src.rag_pipeline import RAG
 from src.config import settings
+from src.profiling import summarize_profiles
+from src.evaluation import load_golden_set, build_sweep, build_offline_index, evaluate, format_results, save_results
 
-def is_document_processed(document_manager):
-    """Check if documents are already processed in vector store"""
-    try:
-        all_docs = document_manager.vector_store.get()
-        doc_count = len(all_docs.get('ids', []))
-        logger.info(f"Found {doc_count} existing documents in vector store")
-        return doc_count > 0
-    except Exception as e:
-        logger.warning(f"Could not check vector store: {e}")
-        return False
+def is_document_processed(document_manager, source):
+    """Check if a source document was fully ingested into the vector store"""
+    stats = document_manager.stats()
+    logger.info(f"Found {stats['total_documents']} existing documents in vector store {stats['content_types']}")
+    return document_manager.is_ingest_complete(source)
+
+def ingest(document_manager, source):
+    """Partition, summarize and index a PDF window by window, resuming an interrupted ingest"""
+    window_pages = settings.partition_window_pages
+    state = document_manager.get_ingest_state(source)
+    windows_done = 0
+    if state and state.get("window_pages") == window_pages:
+        windows_done = state.get("windows_done", 0)
+        if windows_done:
+            logger.info(f"Resuming ingest of {source} after {windows_done} indexed windows")
+
+    # Process document window by window so each batch is indexed as it arrives
+    for tables, texts, images in iter_partition(source, window_pages=window_pages, start_window=windows_done):
+        if settings.image_dedup_enabled:
+            # Near-duplicate images share the stored copy, its summary and its vector
+            images = image_hash_index.dedupe(images, lambda cid: document_manager.docstore.mget([cid])[0])
+        text_summaries = summarize(texts)
+        table_summaries = summarize_tables(tables)
+        image_summaries = image_summarize(images)
+
+        # Store in vector store
+        document_manager.add_documents(texts, text_summaries, tables, table_summaries, images, image_summaries,
+                                       source=source)
+        windows_done += 1
+        document_manager.record_ingest_progress(source, window_pages, windows_done)
+
+    document_manager.record_ingest_progress(source, window_pages, windows_done, complete=True)
 
 def main():
     # Setup logging
@@ -25,17 +54,10 @@ def main():
     document_manager = DocumentManager()
     
     # Check if we need to process the PDF
-    if not is_document_processed(document_manager):
-        logger.info("No existing documents found, processing PDF...")
-        
-        # Process document
-        tables, texts, images = partition(settings.default_pdf_path)
-        text_summaries = summarize(texts)
-        table_summaries = summarize([table.metadata.text_as_html for table in tables])
-        image_summaries = image_summarize(images)
-        
-        # Store in vector store
-        document_manager.add_documents(texts, text_summaries, tables, table_summaries, images, image_summaries)
+    source = settings.default_pdf_path
+    if not is_document_processed(document_manager, source):
+        logger.info("Document not fully processed, processing PDF...")
+        ingest(document_manager, source)
     else:
         logger.info("Using existing processed documents")
     
@@ -46,6 +68,114 @@ def main():
     
     print(f"Query: {query}")
     print(f"Answer: {result.get('response', result)}")
-    
+
+def run_delete(source):
+    """Delete one source document from all stores"""
+    setup_logging()
+    document_manager = DocumentManager()
+    removed = document_manager.delete_document(source)
+    print(f"Deleted {source}: {removed['vectors']} vectors, {removed['docstore']} docstore entries, "
+          f"{removed['summaries']} summaries")
+
+def run_gc(dry_run=False, prune_cache=False):
+    """Remove unreachable content from the vector store, docstore and summary cache"""
+    setup_logging()
+    document_manager = DocumentManager()
+    report = document_manager.gc(dry_run=dry_run, prune_cache=prune_cache)
+    prefix = "Would delete" if dry_run else "Deleted"
+    print(f"{prefix}: {report['orphan_vectors']} vectors, {report['orphan_docstore']} docstore entries, "
+          f"{report['orphan_summaries']} summaries")
+    if not dry_run:
+        print(f"Reclaimed {report['bytes_reclaimed']} bytes ({report['bytes_before']} -> {report['bytes_after']})")
+
+def run_export(path):
+    """Write the whole index to a portable bundle file"""
+    setup_logging()
+    manifest = export_bundle(DocumentManager(), path)
+    print(f"Exported {manifest['count']} vectors to {path}")
+
+def run_import(path, verify=True):
+    """Load a bundle file into the local index without re-embedding"""
+    setup_logging()
+    # Chroma's files are restored before DocumentManager opens the persist directory
+    restored = restore_vector_store(path, DEFAULT_PERSIST_DIRECTORY, verify=verify)
+    loaded = import_bundle(DocumentManager(), path, verify=verify and not restored, vectors_restored=restored)
+    print(f"Imported {loaded['vectors']} vectors, {loaded['docstore']} docstore entries, "
+          f"{loaded['images']} images from {path}")
+
+def run_profile_summary(directory, sort="cumulative", limit=15):
+    """Print per-stage totals and hottest functions from a profile directory"""
+    summarize_profiles(directory or settings.profile_dir or "./profiles", sort=sort, limit=limit)
+
+def run_eval(golden_path, k_values, fetch_k_values, budgets, offline=False,
+             persist_directory="./chroma_db", output=None):
+    """Sweep retrieval parameters over a golden query set and report recall vs latency"""
+    setup_logging()
+    golden = load_golden_set(golden_path)
+    configs = build_sweep(k_values, fetch_k_values, budgets)
+    if offline:
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp:
+            results = evaluate(build_offline_index(persist_directory, tmp), golden, configs)
+    else:
+        results = evaluate(DocumentManager(persist_directory), golden, configs)
+
+    print(format_results(results))
+    if output:
+        save_results(results, output)
+        print(f"Saved results to {output}")
+    else:
+        print(json.dumps(results, indent=2))
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="MultiRAG: multimodal RAG over PDF documents")
+    subparsers = parser.add_subparsers(dest="command")
+
+    gc_parser = subparsers.add_parser("gc", help="delete unreachable content and compact the stores")
+    gc_parser.add_argument("--dry-run", action="store_true", help="only report what would be deleted")
+    gc_parser.add_argument("--prune-cache", action="store_true",
+                           help="also delete cached summaries this index never held (shared caches: other indexes lose them)")
+
+    delete_parser = subparsers.add_parser("delete", help="delete an ingested source document")
+    delete_parser.add_argument("source", help="source PDF path as ingested")
+
+    export_parser = subparsers.add_parser("export", help="export the index to a portable bundle file")
+    export_parser.add_argument("path", help="bundle file to write")
+
+    import_parser = subparsers.add_parser("import", help="load a bundle file into the local index")
+    import_parser.add_argument("path", help="bundle file to read")
+    import_parser.add_argument("--no-verify", action="store_true", help="skip section checksum verification")
+
+    profile_parser = subparsers.add_parser("profile", help="summarize stage profiles written with MULTIRAG_PROFILE_DIR")
+    profile_parser.add_argument("directory", nargs="?", help="profile directory (default: settings.profile_dir)")
+    profile_parser.add_argument("--sort", default="cumulative", help="pstats sort key (cumulative, tottime, calls)")
+    profile_parser.add_argument("--limit", type=int, default=15, help="functions shown per stage")
+
+    eval_parser = subparsers.add_parser("eval", help="measure retrieval recall vs latency on a golden query set")
+    eval_parser.add_argument("golden", help="JSON/JSONL file of {question, expected_ids} entries")
+    eval_parser.add_argument("--k", type=int, nargs="+", default=[2, 4, 8], help="retrieval depths to sweep")
+    eval_parser.add_argument("--fetch-k", type=int, nargs="+", default=[0],
+                             help="MMR candidate pool sizes to sweep (0 = no re-ranking)")
+    eval_parser.add_argument("--budget", type=int, nargs="+", default=[0],
+                             help="context token budgets to sweep (0 = unlimited)")
+    eval_parser.add_argument("--offline", action="store_true",
+                             help="re-embed stored summaries with deterministic hash embeddings (no network)")
+    eval_parser.add_argument("--persist-directory", default="./chroma_db", help="stored index to evaluate")
+    eval_parser.add_argument("--output", help="write results JSON to this file instead of stdout")
+    return parser
+
 if __name__ == "__main__":
-    main()
+    args = build_parser().parse_args()
+    if args.command == "gc":
+        run_gc(args.dry_run, args.prune_cache)
+    elif args.command == "delete":
+        run_delete(args.source)
+    elif args.command == "export":
+        run_export(args.path)
+    elif args.command == "import":
+        run_import(args.path, verify=not args.no_verify)
+    elif args.command == "profile":
+        run_profile_summary(args.directory, args.sort, args.limit)
+    elif args.command == "eval":
+        run_eval(args.golden, args.k, args.fetch_k, args.budget, args.offline, args.persist_directory, args.output)
+    else:
+        main()
@@ -0,0 +1,458 @@
+"""
+Portable single-file index bundle for fast replica cold start
+
+Layout (all integers little-endian):
+
+    MAGIC | VERSION (u32) | section ... | manifest JSON | manifest length (u64) | MAGIC
+
+Sections start on 64-byte boundaries so the vector matrix (raw float32,
+row-major) can be used straight from a memory map. The trailing manifest
+records each section's offset, length and SHA-256.
+
+When exported from a persistent Chroma store, the bundle also carries Chroma's
+own files (the SQLite database and the HNSW segment directories), so a fresh
+replica restores the built index by writing files instead of re-inserting
+every vector.
+"""
+import base64
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import sqlite3
+import struct
+import tempfile
+import time
+from typing import Any, BinaryIO, Optional
+import numpy as np
+from .config import settings
+from .utils import handle_errors, logger, VectorStoreError
+
+MAGIC = b"MRAGBNDL"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+CHROMA_DB_FILE = "chroma.sqlite3"
+COPY_CHUNK_SIZE = 1 << 20
+
+
+def _chroma_version() -> Optional[str]:
+    """Installed chromadb version; Chroma's files are only restored into the same version"""
+    try:
+        import chromadb
+    except ImportError:
+        return None
+    return chromadb.__version__
+
+
+def _check_embeddings(manifest: dict[str, Any]) -> None:
+    """Reject bundles whose vectors came from another embedding provider or model"""
+    if manifest["embedding_model"] != settings.embedding_model_name:
+        raise VectorStoreError(
+            f"Bundle was built with embedding model {manifest['embedding_model']}, "
+            f"but settings.embedding_model_name is {settings.embedding_model_name}"
+        )
+    # Bundles written before the provider was recorded only carry the model name
+    provider = manifest.get("embedding_provider")
+    if provider is not None and provider != settings.embedding_provider:
+        raise VectorStoreError(
+            f"Bundle was built with embedding provider {provider}, "
+            f"but settings.embedding_provider is {settings.embedding_provider}"
+        )
+
+
+class _SectionWriter:
+    """Append aligned, checksummed sections to a bundle file"""
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.sections: dict[str, dict[str, Any]] = {}
+        self._name: Optional[str] = None
+
+    def begin(self, name: str) -> None:
+        padding = -self.f.tell() % ALIGNMENT
+        self.f.write(b"\0" * padding)
+        self._name = name
+        self._offset = self.f.tell()
+        self._digest = hashlib.sha256()
+
+    def write(self, data: bytes) -> None:
+        self.f.write(data)
+        self._digest.update(data)
+
+    def end(self, **info: Any) -> None:
+        self.sections[self._name] = {
+            "offset": self._offset,
+            "length": self.f.tell() - self._offset,
+            "sha256": self._digest.hexdigest(),
+            **info,
+        }
+
+    def add(self, name: str, data: bytes, **info: Any) -> None:
+        self.begin(name)
+        self.write(data)
+        self.end(**info)
+
+
+def _write_chroma_files(writer: _SectionWriter, persist_directory: str) -> None:
+    """Pack the HNSW segment files, then a consistent snapshot of Chroma's SQLite database"""
+    file_index = []
+    writer.begin("chroma")
+    position = 0
+
+    def add_file(relpath: str, file_path: str) -> None:
+        nonlocal position
+        length = 0
+        with open(file_path, 'rb') as f:
+            while data := f.read(COPY_CHUNK_SIZE):
+                writer.write(data)
+                length += len(data)
+        file_index.append([relpath, position, length])
+        position += length
+
+    # Segments are packed before the database snapshot: the database may be newer
+    # than a segment (Chroma replays the difference on load), never older
+    for entry in sorted(os.listdir(persist_directory)):
+        segment_dir = os.path.join(persist_directory, entry)
+        if not os.path.isdir(segment_dir):
+            continue
+        for root, _, names in os.walk(segment_dir):
+            for name in sorted(names):
+                file_path = os.path.join(root, name)
+                add_file(os.path.relpath(file_path, persist_directory).replace(os.sep, "/"), file_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = os.path.join(tmp, CHROMA_DB_FILE)
+        source = sqlite3.connect(os.path.join(persist_directory, CHROMA_DB_FILE), timeout=30)
+        target = sqlite3.connect(snapshot)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        add_file(CHROMA_DB_FILE, snapshot)
+    writer.end(index=file_index)
+
+
+@handle_errors("index bundle export")
+def export_bundle(document_manager: Any, path: str) -> dict[str, Any]:
+    """
+    Pack vectors, metadata, docstore content and image blobs into one bundle file
+
+    Chroma's own files are included when the index is a persistent Chroma store;
+    export from an index no other process is writing to.
+
+    Args:
+        document_manager: DocumentManager whose index is exported
+        path: Output bundle path
+
+    Returns:
+        Bundle manifest
+    """
+    collection = document_manager.vector_store._collection
+    total = collection.count()
+    ids: list[str] = []
+    documents: list[str] = []
+    metadatas: list[dict[str, Any]] = []
+    dim = None
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack("<I", FORMAT_VERSION))
+        writer = _SectionWriter(f)
+
+        # Vectors are streamed batch by batch straight into the file
+        writer.begin("vectors")
+        for offset in range(0, total, EXPORT_BATCH_SIZE):
+            batch = collection.get(
+                limit=EXPORT_BATCH_SIZE, offset=offset,
+                include=["embeddings", "documents", "metadatas"]
+            )
+            vectors = np.asarray(batch["embeddings"], dtype="<f4")
+            if len(vectors) == 0:
+                continue
+            if dim is None:
+                dim = vectors.shape[1]
+            writer.write(np.ascontiguousarray(vectors).tobytes())
+            ids.extend(batch["ids"])
+            documents.extend(batch["documents"])
+            metadatas.extend(batch["metadatas"])
+        writer.end(dtype="<f4", shape=[len(ids), dim or 0])
+
+        records = {"ids": ids, "documents": documents, "metadatas": metadatas}
+        writer.add("records", json.dumps(records, ensure_ascii=False).encode('utf-8'))
+
+        # Images are stored as raw bytes (not base64) and indexed by content ID
+        elements = {}
+        image_index = []
+        writer.begin("images")
+        position = 0
+        for key, value in document_manager.docstore.store.items():
+            if isinstance(value, str):
+                data = base64.b64decode(value)
+                writer.write(data)
+                image_index.append([key, position, len(data)])
+                position += len(data)
+            else:
+                elements[key] = value
+        writer.end(index=image_index)
+
+        writer.add("docstore", pickle.dumps(elements, protocol=pickle.HIGHEST_PROTOCOL))
+        writer.add("documents", json.dumps(document_manager._documents, ensure_ascii=False).encode('utf-8'))
+        writer.add("ingest_state", json.dumps(document_manager._ingest_state, ensure_ascii=False).encode('utf-8'))
+
+        persist_directory = getattr(document_manager, "persist_directory", None)
+        chroma_version = _chroma_version()
+        if (chroma_version and persist_directory
+                and os.path.exists(os.path.join(persist_directory, CHROMA_DB_FILE))):
+            _write_chroma_files(writer, persist_directory)
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "created_at": time.time(),
+            "embedding_provider": settings.embedding_provider,
+            "embedding_model": settings.embedding_model_name,
+            "chroma_version": chroma_version if "chroma" in writer.sections else None,
+            "count": len(ids),
+            "dim": dim or 0,
+            "sections": writer.sections,
+        }
+        manifest_bytes = json.dumps(manifest).encode('utf-8')
+        f.write(manifest_bytes + struct.pack("<Q", len(manifest_bytes)) + MAGIC)
+    os.replace(tmp_path, path)
+
+    logger.info(f"Exported {len(ids)} vectors, {len(elements)} docstore elements and "
+                f"{len(image_index)} images to {path} ({os.path.getsize(path)} bytes)")
+    return manifest
+
+
+class IndexBundle:
+    """Read-only, memory-mapped view of a bundle file"""
+
+    def __init__(self, path: str, verify: bool = True):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            self._file.close()
+            raise VectorStoreError(f"Bundle file is empty: {path}") from e
+        self.manifest = self._read_manifest()
+        if verify:
+            self.verify()
+
+    def _read_manifest(self) -> dict[str, Any]:
+        mm = self._mm
+        header = len(MAGIC) + 4
+        trailer = 8 + len(MAGIC)
+        if len(mm) < header + trailer or mm[:len(MAGIC)] != MAGIC or mm[-len(MAGIC):] != MAGIC:
+            raise VectorStoreError(f"Not a MultiRAG index bundle: {self.path}")
+        version = struct.unpack("<I", mm[len(MAGIC):header])[0]
+        if version != FORMAT_VERSION:
+            raise VectorStoreError(f"Unsupported bundle version {version} (expected {FORMAT_VERSION})")
+        manifest_length = struct.unpack("<Q", mm[-trailer:-len(MAGIC)])[0]
+        start = len(mm) - trailer - manifest_length
+        return json.loads(mm[start:len(mm) - trailer].decode('utf-8'))
+
+    def _section(self, name: str) -> memoryview:
+        info = self.manifest["sections"][name]
+        return memoryview(self._mm)[info["offset"]:info["offset"] + info["length"]]
+
+    def verify(self) -> None:
+        """Check every section's SHA-256"""
+        for name, info in self.manifest["sections"].items():
+            section = self._section(name)
+            digest = hashlib.sha256(section).hexdigest()
+            section.release()
+            if digest != info["sha256"]:
+                raise VectorStoreError(f"Checksum mismatch in bundle section '{name}'")
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Vector matrix backed by the memory map (no copy)"""
+        info = self.manifest["sections"]["vectors"]
+        count, dim = info["shape"]
+        return np.frombuffer(self._mm, dtype=info["dtype"], count=count * dim,
+                             offset=info["offset"]).reshape(count, dim)
+
+    def _section_bytes(self, name: str) -> bytes:
+        """Copy of a section, so no view on the memory map outlives the call"""
+        with self._section(name) as section:
+            return bytes(section)
+
+    def records(self) -> dict[str, list[Any]]:
+        """Vector IDs, summary texts and metadata, aligned with vectors"""
+        return json.loads(self._section_bytes("records").decode('utf-8'))
+
+    def docstore_elements(self) -> dict[str, Any]:
+        """Original text and table elements by content ID (pickle: only open trusted bundles)"""
+        return pickle.loads(self._section_bytes("docstore"))
+
+    def images(self) -> dict[str, str]:
+        """Base64 images by content ID"""
+        info = self.manifest["sections"]["images"]
+        images = {}
+        with self._section("images") as data:
+            for key, start, length in info["index"]:
+                with data[start:start + length] as image:
+                    images[key] = base64.b64encode(image).decode('ascii')
+        return images
+
+    def documents(self) -> dict[str, list[str]]:
+        """Source document -> content IDs manifest"""
+        return json.loads(self._section_bytes("documents").decode('utf-8'))
+
+    def ingest_state(self) -> dict[str, dict[str, Any]]:
+        """Per-source ingest progress (bundles without it count every document as complete)"""
+        if "ingest_state" not in self.manifest["sections"]:
+            return {source: {"window_pages": 0, "windows_done": 1, "complete": True}
+                    for source in self.documents()}
+        return json.loads(self._section_bytes("ingest_state").decode('utf-8'))
+
+    def chroma_files(self) -> list[tuple[str, int, int]]:
+        """Chroma file paths (relative to the persist directory) with their offset and length"""
+        info = self.manifest["sections"].get("chroma")
+        return [tuple(entry) for entry in info["index"]] if info else []
+
+    def close(self) -> None:
+        try:
+            self._mm.close()
+        except BufferError:
+            # Arrays from the vectors property still reference the map; it is released with them
+            logger.debug(f"Bundle {self.path} stays mapped until its vector arrays are released")
+        self._file.close()
+
+    def __enter__(self) -> "IndexBundle":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+@handle_errors("vector store restore")
+def restore_vector_store(path: str, persist_directory: str, verify: bool = True) -> bool:
+    """
+    Write Chroma's files from a bundle into a persist directory that has no vector store yet
+
+    Must run before anything opens persist_directory with Chroma. Restoring files
+    is a plain copy, so it takes about as long as the export; the rest of the
+    index is then loaded with import_bundle(..., vectors_restored=True).
+
+    Args:
+        path: Bundle path
+        persist_directory: Chroma persist directory of the target index
+        verify: Check section checksums before restoring
+
+    Returns:
+        True if the vector store was restored; False if the bundle carries no Chroma
+        files, was written with another chromadb version, or persist_directory
+        already holds a vector store (import_bundle then inserts the vectors)
+
+    Raises:
+        VectorStoreError: If the bundle is invalid or was built with another embedding model
+    """
+    with IndexBundle(path, verify=verify) as bundle:
+        _check_embeddings(bundle.manifest)
+        files = bundle.chroma_files()
+        if not files:
+            logger.info(f"Bundle {path} carries no Chroma files; vectors will be inserted")
+            return False
+        if bundle.manifest.get("chroma_version") != _chroma_version():
+            logger.info(f"Bundle {path} was written with chromadb {bundle.manifest.get('chroma_version')}, "
+                        f"installed is {_chroma_version()}; vectors will be inserted")
+            return False
+        if os.path.exists(os.path.join(persist_directory, CHROMA_DB_FILE)):
+            logger.info(f"{persist_directory} already holds a vector store; vectors will be inserted")
+            return False
+
+        with bundle._section("chroma") as data:
+            for relpath, start, length in files:
+                file_path = os.path.join(persist_directory, *relpath.split("/"))
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                # The database is written last and atomically: until it exists, the
+                # directory still counts as empty and the restore can be retried
+                tmp_path = f"{file_path}.tmp"
+                with data[start:start + length] as content, open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, file_path)
+
+    logger.info(f"Restored {len(files)} Chroma files from {path} into {persist_directory}")
+    return True
+
+
+@handle_errors("index bundle import")
+def import_bundle(document_manager: Any, path: str, verify: bool = True,
+                  vectors_restored: bool = False) -> dict[str, int]:
+    """
+    Load a bundle into a DocumentManager without re-embedding anything
+
+    After restore_vector_store the vectors are already in place and only the
+    docstore, manifests and counters are loaded. Otherwise every vector is
+    upserted batch by batch, so import time grows linearly with the number of
+    vectors.
+
+    Args:
+        document_manager: Target DocumentManager (typically on an empty persist directory)
+        path: Bundle path
+        verify: Check section checksums before loading
+        vectors_restored: The bundle's Chroma files were restored into the target's persist directory
+
+    Returns:
+        Number of vectors, docstore elements and images loaded
+
+    Raises:
+        VectorStoreError: If the bundle is invalid, was built with another embedding
+            provider or model, or the restored vector store does not match it
+    """
+    start = time.perf_counter()
+    with IndexBundle(path, verify=verify) as bundle:
+        _check_embeddings(bundle.manifest)
+
+        records = bundle.records()
+        collection = document_manager.vector_store._collection
+        counts = document_manager._type_counts
+        if vectors_restored:
+            if collection.count() != len(records["ids"]):
+                raise VectorStoreError(f"Restored vector store holds {collection.count()} vectors, "
+                                       f"but the bundle has {len(records['ids'])}")
+            for metadata in records["metadatas"]:
+                content_type = (metadata or {}).get("content_type")
+                counts[content_type] = counts.get(content_type, 0) + 1
+        else:
+            vectors = bundle.vectors
+            for i in range(0, len(records["ids"]), IMPORT_BATCH_SIZE):
+                j = i + IMPORT_BATCH_SIZE
+                batch_ids = records["ids"][i:j]
+                existing = set(collection.get(ids=batch_ids, include=[]).get('ids', []))
+                collection.upsert(
+                    ids=batch_ids,
+                    embeddings=vectors[i:j].tolist(),
+                    documents=records["documents"][i:j],
+                    metadatas=records["metadatas"][i:j],
+                )
+                # Only vectors new to this store change the per-type counters
+                for vector_id, metadata in zip(batch_ids, records["metadatas"][i:j]):
+                    if vector_id not in existing:
+                        content_type = (metadata or {}).get("content_type")
+                        counts[content_type] = counts.get(content_type, 0) + 1
+            del vectors
+
+        elements = bundle.docstore_elements()
+        images = bundle.images()
+        document_manager.docstore.mset(list(elements.items()) + list(images.items()))
+
+        for source, content_ids in bundle.documents().items():
+            known = document_manager._documents.setdefault(source, [])
+            known.extend(cid for cid in content_ids if cid not in known)
+        document_manager._ingest_state.update(bundle.ingest_state())
+
+    document_manager._save_stats()
+    document_manager._save_docstore()
+    document_manager._save_documents()
+    document_manager._save_ingest_state()
+
+    loaded = {"vectors": len(records["ids"]), "docstore": len(elements), "images": len(images)}
+    logger.info(f"Imported bundle {path} in {time.perf_counter() - start:.2f}s: {loaded}")
+    return loaded
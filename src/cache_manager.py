@@ -4,20 +4,32 @@ Cache management for summaries using stable content-based IDs
 import hashlib
 import json
 import os
+import socket
+import sqlite3
 import threading
-from typing import Optional, Union
+import time
+import uuid
+from typing import Any, Optional, Union
 from .utils import logger
+from .config import settings
 
 
 class CacheManager:
     """Manages local caching of summaries using stable content-based IDs"""
-    
-    def __init__(self, cache_dir: str = "./cache"):
+
+    cache_filename = "summaries.json"
+    namespaces_filename = "namespaces.json"
+
+    def __init__(self, cache_dir: str = "./cache", claim_ttl: float = 300.0):
         self.cache_dir = cache_dir
-        self.cache_file = os.path.join(cache_dir, "summaries.json")
+        self.cache_file = os.path.join(cache_dir, self.cache_filename)
+        self.claim_ttl = claim_ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
         self._ensure_cache_dir()
         self._lock = threading.Lock()
+        self._claims: dict[str, float] = {}
         self._cache: dict[str, str] = self._load_cache()
+        self._namespaces: dict[str, dict[str, Any]] = self._load_namespaces()
 
 
     def _ensure_cache_dir(self) -> None:
@@ -29,9 +41,15 @@ class CacheManager:
 
     def _load_cache(self) -> dict[str, str]:
         """Load existing cache from file"""
-        if os.path.exists(self.cache_file):
+        return self._read_json_cache(self.cache_file)
+
+
+    @staticmethod
+    def _read_json_cache(cache_file: str) -> dict[str, str]:
+        """Read and sanitize a JSON summary cache file"""
+        if os.path.exists(cache_file):
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                with open(cache_file, 'r', encoding='utf-8') as f:
                     cache = json.load(f)
                 if not isinstance(cache, dict):
                     logger.warning("Cache file format invalid (expected object); starting with empty cache")
@@ -96,7 +114,9 @@ class CacheManager:
     def clear_cache(self) -> None:
         """Clear all cached summaries"""
         self._cache.clear()
+        self._namespaces.clear()
         self._save_cache()
+        self._save_namespaces()
         logger.info("Cleared all cached summaries")
     
     def get_cache_stats(self) -> dict[str, Union[int, bool]]:
@@ -115,6 +135,454 @@ class CacheManager:
             return True
         return False
 
+    def keys(self) -> list[str]:
+        """All cache keys (namespaced content IDs)"""
+        return list(self._cache)
+
+    def delete_summaries(self, keys: list[str]) -> int:
+        """Delete several cached summaries with one write. Returns the number removed."""
+        removed = 0
+        for key in keys:
+            if self._cache.pop(key, None) is not None:
+                removed += 1
+        if removed:
+            self._save_cache()
+        return removed
+
+    def compact(self) -> None:
+        """Rewrite the cache file without dead space"""
+        self._save_cache()
+
+    def claim(self, content_id: str) -> bool:
+        """
+        Claim a content ID before summarizing it so no other worker does the same work
+
+        Returns:
+            True if this worker now owns the claim, False if another worker holds
+            an unexpired claim or the summary already exists
+        """
+        now = time.time()
+        with self._lock:
+            if content_id in self._cache:
+                return False
+            expires_at = self._claims.get(content_id)
+            if expires_at is not None and expires_at > now:
+                return False
+            self._claims[content_id] = now + self.claim_ttl
+            return True
+
+    def release(self, content_id: str) -> None:
+        """Release a claim taken with claim()"""
+        with self._lock:
+            self._claims.pop(content_id, None)
+
+    def claim_expiry(self, content_id: str) -> Optional[float]:
+        """Expiry time of the claim on a content ID, or None if it is not claimed"""
+        with self._lock:
+            return self._claims.get(content_id)
+
+    def wait_for_summaries(self, content_ids: list[str], poll_interval: float = 0.5) -> dict[str, Optional[str]]:
+        """
+        Wait for summaries other workers are producing
+
+        All IDs are polled together; each is awaited until its summary appears or
+        its claim expires or is released, so the total wait is bounded by the
+        latest claim expiry rather than one TTL per item.
+
+        Returns:
+            content ID -> summary, or None where the claim lapsed without a summary
+        """
+        results: dict[str, Optional[str]] = {}
+        pending = list(content_ids)
+        while pending:
+            now = time.time()
+            waiting = []
+            for content_id in pending:
+                summary = self.get_summary(content_id)
+                expires_at = self.claim_expiry(content_id)
+                if summary is not None or expires_at is None or expires_at <= now:
+                    results[content_id] = summary
+                else:
+                    waiting.append(content_id)
+            pending = waiting
+            if pending:
+                time.sleep(poll_interval)
+        return results
+
+    @staticmethod
+    def make_namespace(params: dict[str, Any]) -> str:
+        """Fingerprint a summarization configuration (provider, model, prompt, ...)"""
+        payload = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+    @staticmethod
+    def namespaced_id(content_id: str, namespace: Optional[str] = None) -> str:
+        """Cache key for a content ID within a namespace (legacy keys have no namespace)"""
+        return f"{namespace}:{content_id}" if namespace else content_id
+
+    @staticmethod
+    def split_namespaced_id(key: str) -> tuple[str, str]:
+        """Split a cache key into (namespace, content_id); legacy keys give ''"""
+        namespace, sep, content_id = key.partition(":")
+        return (namespace, content_id) if sep else ("", key)
+
+    def _load_namespaces(self) -> dict[str, dict[str, Any]]:
+        """Load the namespace registry"""
+        path = os.path.join(self.cache_dir, self.namespaces_filename)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    namespaces = json.load(f)
+                if isinstance(namespaces, dict):
+                    return namespaces
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Failed to load namespace registry: {e}")
+        return {}
+
+    def _save_namespaces(self) -> None:
+        path = os.path.join(self.cache_dir, self.namespaces_filename)
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._namespaces, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except IOError as e:
+                logger.error(f"Failed to save namespace registry: {e}")
+
+    def _registry(self) -> dict[str, dict[str, Any]]:
+        return self._namespaces
+
+    def register_namespace(self, namespace: str, params: dict[str, Any]) -> None:
+        """Record a namespace's configuration and mark it as used now"""
+        now = time.time()
+        entry = self._namespaces.setdefault(namespace, {"params": params, "created_at": now})
+        entry["last_used"] = now
+        self._save_namespaces()
+
+    def _namespace_counts(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for key in list(self._cache):
+            namespace = self.split_namespaced_id(key)[0]
+            counts[namespace] = counts.get(namespace, 0) + 1
+        return counts
+
+    def _delete_namespace_entries(self, namespace: str) -> int:
+        keys = [key for key in self._cache if self.split_namespaced_id(key)[0] == namespace]
+        for key in keys:
+            del self._cache[key]
+        self._namespaces.pop(namespace, None)
+        self._save_cache()
+        self._save_namespaces()
+        return len(keys)
+
+    def list_namespaces(self) -> list[dict[str, Any]]:
+        """
+        List cache namespaces, most recently used first
+
+        Returns:
+            Dicts with namespace, params, created_at, last_used and entries.
+            Summaries cached before namespacing are listed under namespace ''.
+        """
+        counts = self._namespace_counts()
+        registry = self._registry()
+        infos = []
+        for namespace in set(counts) | set(registry):
+            entry = registry.get(namespace, {})
+            infos.append({
+                "namespace": namespace,
+                "params": entry.get("params", {}),
+                "created_at": entry.get("created_at"),
+                "last_used": entry.get("last_used"),
+                "entries": counts.get(namespace, 0),
+            })
+        return sorted(infos, key=lambda info: info["last_used"] or 0, reverse=True)
+
+    def delete_namespace(self, namespace: str) -> int:
+        """Delete all summaries in a namespace. Returns the number removed."""
+        removed = self._delete_namespace_entries(namespace)
+        logger.info(f"Deleted namespace '{namespace}' ({removed} summaries)")
+        return removed
+
+    def prune_namespaces(self,
+                         max_age_days: Optional[float] = None,
+                         max_entries: Optional[int] = None,
+                         keep: tuple[str, ...] = (),
+                         dry_run: bool = False) -> list[str]:
+        """
+        Remove stale namespaces
+
+        Args:
+            max_age_days: Remove namespaces not used for this many days
+            max_entries: Keep the most recently used namespaces whose summaries fit
+                within this total, remove the rest
+            keep: Namespaces that are never removed
+            dry_run: Only report what would be removed
+
+        Returns:
+            Namespaces removed (or that would be removed)
+        """
+        cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+        to_remove = []
+        total = 0
+        for info in self.list_namespaces():
+            namespace = info["namespace"]
+            if namespace in keep:
+                total += info["entries"]
+                continue
+            too_old = cutoff is not None and (info["last_used"] or 0) < cutoff
+            too_big = max_entries is not None and total + info["entries"] > max_entries
+            if too_old or too_big:
+                to_remove.append(namespace)
+            else:
+                total += info["entries"]
+
+        if not dry_run:
+            for namespace in to_remove:
+                self.delete_namespace(namespace)
+        return to_remove
+
+
+class SQLiteCacheManager(CacheManager):
+    """
+    Summary cache shared safely by several processes through one SQLite file
+
+    Summaries are read from the database on every lookup (a primary-key read),
+    never memoized, so deletes and overwrites by other processes are seen at once.
+    """
+
+    cache_filename = "summaries.db"
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection (reopened after fork)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.cache_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+    def _load_cache(self) -> dict[str, str]:
+        """Create the schema and import the JSON cache on first use; entries are not held in memory"""
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("""CREATE TABLE IF NOT EXISTS summaries (
+            content_id TEXT PRIMARY KEY, summary TEXT NOT NULL, updated_at REAL NOT NULL)""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS claims (
+            content_id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS namespaces (
+            namespace TEXT PRIMARY KEY, params TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)""")
+
+        legacy_file = os.path.join(self.cache_dir, CacheManager.cache_filename)
+        count = conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        if count == 0 and os.path.exists(legacy_file):
+            legacy = self._read_json_cache(legacy_file)
+            now = time.time()
+            conn.executemany(
+                "INSERT OR IGNORE INTO summaries VALUES (?, ?, ?)",
+                [(k, v, now) for k, v in legacy.items()]
+            )
+            logger.info(f"Imported {len(legacy)} summaries from {legacy_file}")
+        return {}
+
+
+    def _save_cache(self) -> None:
+        """Writes go straight to the database"""
+
+
+    def get_summary(self, content_id: str) -> Optional[str]:
+        """Get cached summary by content ID"""
+        row = self._connect().execute(
+            "SELECT summary FROM summaries WHERE content_id = ?", (content_id,)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+
+    def set_summary(self, content_id: str, summary: str) -> None:
+        """Cache a summary and drop any claim on it"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)", (content_id, summary, time.time())
+            )
+            conn.execute("DELETE FROM claims WHERE content_id = ?", (content_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        logger.debug(f"Cached summary for ID: {content_id[:8]}...")
+
+    def has_summary(self, content_id: str) -> bool:
+        """Check if summary exists in cache"""
+        return self.get_summary(content_id) is not None
+
+    def clear_cache(self) -> None:
+        """Clear all cached summaries"""
+        conn = self._connect()
+        conn.execute("DELETE FROM summaries")
+        conn.execute("DELETE FROM claims")
+        conn.execute("DELETE FROM namespaces")
+        logger.info("Cleared all cached summaries")
+
+    def get_cache_stats(self) -> dict[str, Union[int, bool]]:
+        """Get cache statistics"""
+        conn = self._connect()
+        return {
+            "total_summaries": conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0],
+            "active_claims": conn.execute(
+                "SELECT COUNT(*) FROM claims WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0],
+            "cache_file_exists": os.path.exists(self.cache_file)
+        }
+
+    def delete_summary(self, content_id: str) -> bool:
+        """Delete a cached summary. Returns True if removed."""
+        cursor = self._connect().execute("DELETE FROM summaries WHERE content_id = ?", (content_id,))
+        if cursor.rowcount > 0:
+            logger.debug(f"Deleted cached summary for ID: {content_id[:8]}...")
+            return True
+        return False
+
+    def keys(self) -> list[str]:
+        """All cache keys (namespaced content IDs)"""
+        return [row[0] for row in self._connect().execute("SELECT content_id FROM summaries")]
+
+    def delete_summaries(self, keys: list[str]) -> int:
+        """Delete several cached summaries in one transaction. Returns the number removed."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = 0
+            for key in keys:
+                removed += conn.execute("DELETE FROM summaries WHERE content_id = ?", (key,)).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def compact(self) -> None:
+        """Reclaim free pages in the database file"""
+        conn = self._connect()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+
+    def claim(self, content_id: str) -> bool:
+        """
+        Claim a content ID before summarizing it so no other worker does the same work
+
+        Returns:
+            True if this worker now owns the claim, False if another worker holds
+            an unexpired claim or the summary already exists
+        """
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM summaries WHERE content_id = ?", (content_id,)).fetchone():
+                conn.execute("COMMIT")
+                return False
+            conn.execute(
+                "DELETE FROM claims WHERE content_id = ? AND (expires_at <= ? OR owner = ?)",
+                (content_id, now, self.owner)
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO claims VALUES (?, ?, ?)",
+                (content_id, self.owner, now + self.claim_ttl)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def release(self, content_id: str) -> None:
+        """Release a claim taken with claim()"""
+        self._connect().execute(
+            "DELETE FROM claims WHERE content_id = ? AND owner = ?", (content_id, self.owner)
+        )
+
+    def claim_expiry(self, content_id: str) -> Optional[float]:
+        """Expiry time of the claim on a content ID, or None if it is not claimed"""
+        row = self._connect().execute(
+            "SELECT expires_at FROM claims WHERE content_id = ?", (content_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _load_namespaces(self) -> dict[str, dict[str, Any]]:
+        """The registry lives in the namespaces table"""
+        return {}
+
+    def _registry(self) -> dict[str, dict[str, Any]]:
+        rows = self._connect().execute(
+            "SELECT namespace, params, created_at, last_used FROM namespaces"
+        ).fetchall()
+        return {
+            namespace: {"params": json.loads(params), "created_at": created_at, "last_used": last_used}
+            for namespace, params, created_at, last_used in rows
+        }
+
+    def register_namespace(self, namespace: str, params: dict[str, Any]) -> None:
+        """Record a namespace's configuration and mark it as used now"""
+        now = time.time()
+        self._connect().execute(
+            """INSERT INTO namespaces VALUES (?, ?, ?, ?)
+            ON CONFLICT(namespace) DO UPDATE SET last_used = excluded.last_used""",
+            (namespace, json.dumps(params, sort_keys=True, default=str), now, now)
+        )
+
+    def _namespace_counts(self) -> dict[str, int]:
+        rows = self._connect().execute(
+            """SELECT CASE WHEN instr(content_id, ':') > 0
+                      THEN substr(content_id, 1, instr(content_id, ':') - 1) ELSE '' END AS ns,
+                      COUNT(*)
+               FROM summaries GROUP BY ns"""
+        ).fetchall()
+        return dict(rows)
+
+    def _delete_namespace_entries(self, namespace: str) -> int:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if namespace:
+                cursor = conn.execute(
+                    "DELETE FROM summaries WHERE substr(content_id, 1, ?) = ?",
+                    (len(namespace) + 1, f"{namespace}:")
+                )
+            else:
+                cursor = conn.execute("DELETE FROM summaries WHERE instr(content_id, ':') = 0")
+            conn.execute("DELETE FROM namespaces WHERE namespace = ?", (namespace,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+
+def create_cache_manager(backend: str = None, cache_dir: str = "./cache") -> CacheManager:
+    """
+    Create a summary cache manager
+
+    Args:
+        backend: 'json' (single process) or 'sqlite' (safe for concurrent ingest workers);
+            None to use config default
+        cache_dir: Cache directory
+
+    Returns:
+        CacheManager instance
+    """
+    if backend is None:
+        backend = settings.cache_backend
+    if backend == "json":
+        return CacheManager(cache_dir, claim_ttl=settings.summary_claim_ttl)
+    if backend == "sqlite":
+        return SQLiteCacheManager(cache_dir, claim_ttl=settings.summary_claim_ttl)
+    raise ValueError(f"Unsupported cache backend: {backend}")
+
 
 # Global cache manager instance
-cache_manager = CacheManager()
+cache_manager = create_cache_manager()
@@ -23,10 +23,53 @@ class Settings:
         "google": 0.0
     })
 
-    
+    # Answer LLM failover/hedging: providers tried after `provider`, e.g. ["ollama"]
+    llm_fallback_providers: list[str] = field(default_factory=list)
+    llm_hedge_enabled: bool = True  # send a duplicate request when the primary is slower than usual
+    llm_hedge_quantile: float = 0.95  # hedge after this latency quantile of the primary
+    llm_hedge_initial_delay: float = 2.0  # seconds, until enough latency samples exist
+    llm_hedge_min_delay: float = 0.2
+    llm_circuit_failure_threshold: int = 3  # consecutive failures before a provider is skipped
+    llm_circuit_reset_seconds: float = 30.0
+
     # Embedding settings
+    embedding_provider: str = "google"  # "google", "ollama" or "hash" (deterministic, offline)
     embedding_model_name: str = "models/gemini-embedding-001"
+
+    # HTTP transport of the Ollama chat/embedding clients: a pool of keep-alive
+    # connections is reused across requests instead of reconnecting each time
+    http_max_connections: int = 10
+    http_max_keepalive_connections: int = 5
+    http_keepalive_expiry: float = 60.0  # seconds an idle pooled connection stays open
+    http_timeout: Optional[float] = 120.0
+    ollama_base_url: Optional[str] = None  # None = OLLAMA_HOST or http://localhost:11434
+    ollama_keep_alive: Optional[str] = "30m"  # how long Ollama keeps the model loaded between requests
+    google_transport: Optional[str] = None  # "grpc" (default, one persistent channel) or "rest"
+    # Send a tiny generation/embedding when DocumentManager/RAG are created, so the first
+    # real query does not pay connection setup and model load
+    llm_warmup: bool = False
+
+    # Retrieval: summaries returned per query, optionally re-ranked with MMR for diversity
+    retrieval_k: int = 4
+    rerank_enabled: bool = False
+    rerank_fetch_k: int = 20  # candidates over-fetched before re-ranking
+    rerank_lambda: float = 0.5  # 1.0 = relevance only, 0.0 = diversity only
+    rerank_type_quotas: dict[str, int] = field(default_factory=lambda: {"image": 2})
+    # Estimated prompt tokens of retrieved context passed to the answer LLM (0 = unlimited);
+    # lower-ranked documents that do not fit are dropped
+    context_token_budget: int = 0
     
+    # Summary cache backend: "json" (single process) or "sqlite" (shared by concurrent ingest workers)
+    cache_backend: str = "json"
+    summary_claim_ttl: float = 300.0  # seconds before an in-flight claim may be taken over
+    # Uncached items are claimed and summarized this many at a time, so each batch
+    # finishes well within the claim TTL
+    summary_claim_batch: int = 16
+    # Summaries are namespaced by provider/model/temperature/prompt fingerprint; entries cached
+    # before namespacing are copied into namespaces that look them up (text and images only;
+    # legacy table summaries came from the HTML rather than the compact table form)
+    cache_adopt_legacy: bool = True
+
     # Logging
     log_level: str = "INFO"
     log_file: Optional[str] = None
@@ -34,6 +77,31 @@ class Settings:
     # Default PDF path
     default_pdf_path: str = "./content/attention-is-all-you-need.pdf"
 
+    # Partition result cache (skips layout analysis on re-ingest)
+    partition_cache_enabled: bool = True
+    partition_cache_dir: str = "./cache/partitions"
+
+    # Partition strategy: "hi_res" for every page, or "adaptive" (fast for plain-text pages)
+    partition_strategy: str = "hi_res"
+    adaptive_min_text_chars: int = 200  # below this a page is treated as scanned
+    adaptive_min_ruled_lines: int = 4  # at or above this a page likely holds a table
+
+    # Streaming ingest: pages per partition window (0 = whole document at once)
+    partition_window_pages: int = 0
+
+    # Perceptual-hash image dedup before image summarization
+    image_dedup_enabled: bool = True
+    image_hash_threshold: int = 4  # max Hamming distance (of 64 bits) on both aHash and dHash
+    image_min_side: int = 32  # pixels; smaller (decorative) images are skipped entirely
+
+    # Per-stage cProfile/tracemalloc reports for handle_errors stages (None = disabled);
+    # the MULTIRAG_PROFILE_DIR environment variable takes precedence
+    profile_dir: Optional[str] = None
+    profile_top_allocations: int = 25
+
+    # Table representation for summary prompts and answer context: "markdown", "tsv" or "html"
+    table_format: str = "markdown"
+
 
 # Global settings instance
 settings = Settings()
\ No newline at end of file
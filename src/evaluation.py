@@ -0,0 +1,211 @@
+"""
+Retrieval latency-vs-recall evaluation over golden query sets
+"""
+import itertools
+import json
+import math
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+from .config import settings
+from .tables import estimate_tokens, fit_context
+from .utils import handle_errors, logger
+
+EVAL_BATCH_SIZE = 500
+
+
+@dataclass
+class SweepConfig:
+    """One retrieval configuration; fetch_k 0 disables MMR re-ranking"""
+
+    k: int
+    fetch_k: int = 0
+    context_budget: int = 0
+
+    @property
+    def label(self) -> str:
+        return f"k={self.k} fetch_k={self.fetch_k or '-'} budget={self.context_budget or '-'}"
+
+
+def recall_at_k(retrieved: Sequence[str], expected: Sequence[str], k: Optional[int] = None) -> float:
+    """Fraction of expected IDs among the first k retrieved IDs"""
+    if not expected:
+        return 0.0
+    top = set(retrieved[:k] if k is not None else retrieved)
+    return len(top & set(expected)) / len(set(expected))
+
+
+def reciprocal_rank(retrieved: Sequence[str], expected: Sequence[str]) -> float:
+    """1 / rank of the first expected ID in retrieved, or 0 if none was retrieved"""
+    targets = set(expected)
+    for rank, content_id in enumerate(retrieved, 1):
+        if content_id in targets:
+            return 1.0 / rank
+    return 0.0
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..1), or None without values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def load_golden_set(path: str) -> list[dict[str, Any]]:
+    """
+    Load golden queries from a JSON list or JSON Lines file
+
+    Each entry has "question", "expected_ids" (content IDs, i.e. the doc_id metadata of
+    the stored summaries) and optionally "filters".
+
+    Raises:
+        ValueError: If the file has no entries, or an entry lacks a question or expected IDs
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(".jsonl"):
+            entries = [json.loads(line) for line in f if line.strip()]
+        else:
+            entries = json.load(f)
+    if not entries:
+        raise ValueError(f"Golden set {path} has no queries")
+    for i, entry in enumerate(entries):
+        if not entry.get("question") or not entry.get("expected_ids"):
+            raise ValueError(f"Golden entry {i} needs 'question' and 'expected_ids'")
+    return entries
+
+
+def build_sweep(k_values: Sequence[int],
+                fetch_k_values: Sequence[int] = (0,),
+                context_budgets: Sequence[int] = (0,)) -> list[SweepConfig]:
+    """All combinations of the swept parameters (fetch_k below k is skipped)"""
+    return [
+        SweepConfig(k, fetch_k, budget)
+        for k, fetch_k, budget in itertools.product(k_values, fetch_k_values, context_budgets)
+        if not fetch_k or fetch_k >= k
+    ]
+
+
+def build_offline_index(source_directory: str, target_directory: str) -> Any:
+    """
+    Copy a stored index's summaries into a new collection embedded with the hash provider
+
+    Only the stored summaries, metadata, docstore and document manifest are read,
+    so the evaluation runs without network access or an embedding API key.
+
+    Args:
+        source_directory: Persist directory of the ingested index
+        target_directory: Persist directory for the re-embedded copy
+
+    Returns:
+        DocumentManager over the re-embedded copy
+    """
+    import chromadb
+    from .vector_store import DocumentManager, docstore_path
+
+    # The copy gets the source index's docstore and manifest, not whichever docstore
+    # happens to sit in the working directory
+    os.makedirs(target_directory, exist_ok=True)
+    for source_file, target_file in ((docstore_path(source_directory), docstore_path(target_directory)),
+                                     (os.path.join(source_directory, "documents.json"),
+                                      os.path.join(target_directory, "documents.json"))):
+        if os.path.exists(source_file):
+            shutil.copyfile(source_file, target_file)
+
+    source = chromadb.PersistentClient(path=source_directory).get_collection("multirag")
+    embedding_provider = settings.embedding_provider
+    settings.embedding_provider = "hash"
+    try:
+        document_manager = DocumentManager(persist_directory=target_directory)
+    finally:
+        settings.embedding_provider = embedding_provider
+    total = source.count()
+    for offset in range(0, total, EVAL_BATCH_SIZE):
+        batch = source.get(limit=EVAL_BATCH_SIZE, offset=offset, include=["documents", "metadatas"])
+        document_manager.vector_store.add_texts(batch["documents"], metadatas=batch["metadatas"], ids=batch["ids"])
+    logger.info(f"Re-embedded {total} summaries from {source_directory} with hash embeddings")
+    return document_manager
+
+
+def _evaluate_config(document_manager: Any, golden: list[dict[str, Any]], config: SweepConfig) -> dict[str, Any]:
+    settings.retrieval_k = config.k
+    settings.rerank_enabled = bool(config.fetch_k)
+    settings.rerank_fetch_k = config.fetch_k or settings.rerank_fetch_k
+
+    recalls, reciprocal_ranks, latencies, prompt_tokens = [], [], [], []
+    for entry in golden:
+        start = time.perf_counter()
+        ids, docs = document_manager.retrieve_with_ids(entry["question"], entry.get("filters"))
+        latencies.append(time.perf_counter() - start)
+
+        docs, context_tokens = fit_context(docs, config.context_budget)
+        retrieved = ids[:len(docs)]
+        recalls.append(recall_at_k(retrieved, entry["expected_ids"]))
+        reciprocal_ranks.append(reciprocal_rank(retrieved, entry["expected_ids"]))
+        prompt_tokens.append(context_tokens + estimate_tokens(entry["question"]))
+
+    return {
+        "k": config.k,
+        "fetch_k": config.fetch_k,
+        "context_budget": config.context_budget,
+        "queries": len(golden),
+        "recall_at_k": sum(recalls) / len(recalls),
+        "mrr": sum(reciprocal_ranks) / len(reciprocal_ranks),
+        "latency_p50_ms": percentile(latencies, 0.5) * 1000,
+        "latency_p95_ms": percentile(latencies, 0.95) * 1000,
+        "prompt_tokens_mean": sum(prompt_tokens) / len(prompt_tokens),
+        "prompt_tokens_max": max(prompt_tokens),
+    }
+
+
+@handle_errors("retrieval evaluation")
+def evaluate(document_manager: Any, golden: list[dict[str, Any]], configs: list[SweepConfig]) -> list[dict[str, Any]]:
+    """
+    Measure recall, MRR, retrieval latency and prompt size for each configuration
+
+    Args:
+        document_manager: DocumentManager over the ingested corpus
+        golden: Golden queries (see load_golden_set)
+        configs: Retrieval configurations to compare
+
+    Returns:
+        One result dict per configuration
+
+    Raises:
+        ValueError: If the golden set is empty
+    """
+    if not golden:
+        raise ValueError("Golden set has no queries")
+    saved = (settings.retrieval_k, settings.rerank_enabled, settings.rerank_fetch_k)
+    results = []
+    try:
+        for config in configs:
+            result = _evaluate_config(document_manager, golden, config)
+            logger.info(f"{config.label}: recall {result['recall_at_k']:.3f}, MRR {result['mrr']:.3f}, "
+                        f"p95 {result['latency_p95_ms']:.1f}ms")
+            results.append(result)
+    finally:
+        settings.retrieval_k, settings.rerank_enabled, settings.rerank_fetch_k = saved
+    return results
+
+
+def format_results(results: list[dict[str, Any]]) -> str:
+    """Render evaluation results as a fixed-width table"""
+    header = (f"{'k':>4} {'fetch_k':>8} {'budget':>7} {'recall@k':>9} {'MRR':>6} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'tokens':>8}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['k']:>4} {r['fetch_k'] or '-':>8} {r['context_budget'] or '-':>7} {r['recall_at_k']:>9.3f} "
+            f"{r['mrr']:>6.3f} {r['latency_p50_ms']:>8.1f} {r['latency_p95_ms']:>8.1f} {r['prompt_tokens_mean']:>8.0f}"
+        )
+    return "\n".join(lines)
+
+
+def save_results(results: list[dict[str, Any]], path: str) -> None:
+    """Write evaluation results as JSON"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"created_at": time.time(), "results": results}, f, indent=2)
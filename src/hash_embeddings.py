@@ -0,0 +1,37 @@
+"""
+Deterministic offline embeddings for evaluation and tests (no model, no network)
+"""
+import hashlib
+import math
+import re
+from langchain_core.embeddings import Embeddings
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Signed feature hashing of word unigrams and bigrams into a fixed-size, L2-normalized vector
+
+    Texts sharing words get similar vectors, so lexical retrieval quality can be
+    measured reproducibly without an embedding API.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _embed(self, text: str) -> list[float]:
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        vector = [0.0] * self.dim
+        for feature in features:
+            digest = int.from_bytes(hashlib.md5(feature.encode('utf-8')).digest()[:8], "little")
+            vector[digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
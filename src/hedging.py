@@ -0,0 +1,238 @@
+"""
+Tail-latency hedging, failover and circuit breaking across LLM providers
+"""
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Optional
+from .utils import logger, LLMError
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram plus a window of recent samples for quantiles"""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._buckets = [0] * len(LATENCY_BUCKETS)
+        self._recent: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Record one latency sample"""
+        with self._lock:
+            self._buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            self._recent.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Quantile over recent samples, or None without samples"""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))
+        return samples[index]
+
+    def snapshot(self) -> dict[str, Any]:
+        """Counts per bucket and summary statistics"""
+        with self._lock:
+            buckets = {
+                ("+Inf" if math.isinf(bound) else f"{bound:g}"): n
+                for bound, n in zip(LATENCY_BUCKETS, self._buckets)
+            }
+            count, total = self.count, self.total
+        return {
+            "count": count,
+            "mean": total / count if count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after consecutive failures until a cool-down has passed
+
+    After the cool-down a single trial call is let through; further calls stay
+    blocked until that trial succeeds (closing the circuit) or fails (re-opening it).
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half-open' (cool-down over, next call is a trial)"""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may be made now; in half-open state this claims the single trial call"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._trial_in_flight = False
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                # Re-open on a failed trial call, restarting the cool-down
+                self._opened_at = time.monotonic()
+
+
+class HedgedCaller:
+    """
+    Call an ordered list of providers with hedging and failover
+
+    The first available provider is called. If it has not answered within its
+    recent latency quantile (e.g. p95), a duplicate request goes to the next
+    provider and whichever finishes first wins. A provider that errors is
+    failed over immediately, and a provider that keeps failing is skipped by
+    its circuit breaker until the cool-down passes.
+    """
+
+    def __init__(self,
+                 providers: dict[str, Any],
+                 hedge: bool = True,
+                 hedge_quantile: float = 0.95,
+                 initial_hedge_delay: float = 2.0,
+                 min_hedge_delay: float = 0.2,
+                 min_samples: int = 10,
+                 failure_threshold: int = 3,
+                 reset_seconds: float = 30.0,
+                 max_workers: int = 8):
+        if not providers:
+            raise ValueError("At least one provider is required")
+        self.providers = dict(providers)
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.histograms = {name: LatencyHistogram() for name in self.providers}
+        self.breakers = {name: CircuitBreaker(failure_threshold, reset_seconds) for name in self.providers}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedged-llm")
+
+    def hedge_delay(self, name: str) -> float:
+        """How long to wait for a provider before hedging to the next one"""
+        histogram = self.histograms[name]
+        if histogram.count < self.min_samples:
+            return self.initial_hedge_delay
+        return max(self.min_hedge_delay, histogram.quantile(self.hedge_quantile))
+
+    def _submit(self, name: str, fn: Callable[[Any], Any]) -> Future:
+        start = time.perf_counter()
+
+        def run() -> Any:
+            try:
+                result = fn(self.providers[name])
+            except Exception:
+                self.breakers[name].record_failure()
+                raise
+            self.histograms[name].record(time.perf_counter() - start)
+            self.breakers[name].record_success()
+            return result
+
+        return self._executor.submit(run)
+
+    def call(self, fn: Callable[[Any], Any]) -> Any:
+        """
+        Run fn(provider_client) with hedging and failover
+
+        Args:
+            fn: Function that performs the request against one provider client
+
+        Returns:
+            Result of the first provider to succeed
+
+        Raises:
+            LLMError: If every provider failed
+        """
+        candidates = [name for name in self.providers if self.breakers[name].state != "open"]
+        force = not candidates
+        if force:
+            logger.warning("All LLM provider circuits are open; trying every provider")
+            candidates = list(self.providers)
+
+        pending: dict[Future, str] = {}
+        last_error: Optional[BaseException] = None
+        latest = ""  # Provider called most recently, whose latency decides when to hedge
+
+        def launch_next(reason: str) -> bool:
+            nonlocal latest
+            while candidates:
+                name = candidates.pop(0)
+                # A half-open provider takes one trial call at a time
+                if not force and not self.breakers[name].allow():
+                    logger.debug(f"Skipping LLM provider '{name}': trial call already in flight")
+                    continue
+                if pending or last_error is not None:
+                    logger.info(f"{reason}: sending request to LLM provider '{name}'")
+                pending[self._submit(name, fn)] = name
+                latest = name
+                return True
+            return False
+
+        if not launch_next("Primary"):
+            logger.warning("Every available LLM provider is busy with a trial call; trying every provider")
+            force = True
+            candidates = list(self.providers)
+            launch_next("Primary")
+
+        while pending:
+            timeout = self.hedge_delay(latest) if self.hedge and candidates else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                launch_next(f"No response from '{latest}' after {timeout:.2f}s, hedging")
+                continue
+
+            for future in done:
+                name = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    if pending:
+                        logger.debug(f"LLM provider '{name}' won; abandoning {list(pending.values())}")
+                    return future.result()
+                logger.warning(f"LLM provider '{name}' failed: {error}")
+                last_error = error
+                if candidates:
+                    launch_next("Failing over")
+
+        raise LLMError(f"All LLM providers failed: {last_error}") from last_error
+
+    def latency_stats(self) -> dict[str, dict[str, Any]]:
+        """Latency histogram and circuit state per provider"""
+        return {
+            name: {**self.histograms[name].snapshot(), "circuit": self.breakers[name].state}
+            for name in self.providers
+        }
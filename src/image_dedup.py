@@ -0,0 +1,177 @@
+"""
+Perceptual-hash deduplication of extracted images before image summarization
+
+Images are hashed with aHash and dHash (64 bits each). An image whose hashes
+are both within a Hamming distance threshold of an indexed image is replaced
+by that image's canonical base64, so it reuses one summary and one docstore
+blob. The index persists across runs and PDFs.
+"""
+import base64
+import binascii
+import io
+import json
+import os
+import threading
+from typing import Any, Callable, Optional
+from .utils import logger
+from .config import settings
+from .cache_manager import cache_manager
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow ships with unstructured[pdf]; dedup is skipped without it
+    Image = None
+
+
+def average_hash(image: Any, hash_size: int = 8) -> int:
+    """aHash: one bit per pixel of a downscaled grayscale image, set when above the mean"""
+    pixels = list(image.convert("L").resize((hash_size, hash_size), Image.LANCZOS).tobytes())
+    mean = sum(pixels) / len(pixels)
+    bits = 0
+    for pixel in pixels:
+        bits = (bits << 1) | (pixel > mean)
+    return bits
+
+
+def difference_hash(image: Any, hash_size: int = 8) -> int:
+    """dHash: one bit per horizontally adjacent pixel pair, set when brightness increases"""
+    width = hash_size + 1
+    pixels = list(image.convert("L").resize((width, hash_size), Image.LANCZOS).tobytes())
+    bits = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * width + col]
+            right = pixels[row * width + col + 1]
+            bits = (bits << 1) | (left < right)
+    return bits
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class ImageHashIndex:
+    """Persisted perceptual hashes of canonical images, keyed by content ID"""
+
+    def __init__(self, index_file: str = "./cache/image_hashes.json"):
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, int]] = self._load_index()
+
+    def _load_index(self) -> dict[str, dict[str, int]]:
+        """Load the index from disk"""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {
+                content_id: {"ahash": int(entry["ahash"], 16), "dhash": int(entry["dhash"], 16)}
+                for content_id, entry in data.items()
+            }
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, IOError, KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to load image hash index: {e}, starting with empty index")
+            return {}
+
+    def _save_index(self) -> None:
+        """Save the index to disk"""
+        tmp_path = f"{self.index_file}.tmp"
+        with self._lock:
+            data = {
+                content_id: {"ahash": f"{entry['ahash']:016x}", "dhash": f"{entry['dhash']:016x}"}
+                for content_id, entry in self._entries.items()
+            }
+        try:
+            os.makedirs(os.path.dirname(self.index_file) or ".", exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_file)
+        except IOError as e:
+            logger.error(f"Failed to save image hash index: {e}")
+
+    def find(self, ahash: int, dhash: int, threshold: int) -> list[str]:
+        """Content IDs of indexed images within threshold on both hashes, nearest first"""
+        with self._lock:
+            matches = [
+                (hamming_distance(dhash, entry["dhash"]) + hamming_distance(ahash, entry["ahash"]), content_id)
+                for content_id, entry in self._entries.items()
+                if hamming_distance(dhash, entry["dhash"]) <= threshold
+                and hamming_distance(ahash, entry["ahash"]) <= threshold
+            ]
+        return [content_id for _, content_id in sorted(matches)]
+
+    def add(self, content_id: str, ahash: int, dhash: int) -> None:
+        with self._lock:
+            self._entries[content_id] = {"ahash": ahash, "dhash": dhash}
+
+    def remove(self, content_id: str) -> None:
+        with self._lock:
+            self._entries.pop(content_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _match(self, ahash: int, dhash: int, batch: dict[str, str],
+               resolve: Callable[[str], Optional[str]]) -> Optional[str]:
+        """Canonical base64 image matching the hashes, or None"""
+        for content_id in self.find(ahash, dhash, settings.image_hash_threshold):
+            if content_id in batch:
+                return batch[content_id]
+            stored = resolve(content_id)
+            if stored is not None:
+                return stored
+            self.remove(content_id)  # Canonical image was deleted from the store
+        return None
+
+    def dedupe(self, images: list[str], resolve: Callable[[str], Optional[str]]) -> list[str]:
+        """
+        Drop tiny images and replace near-duplicates with their canonical image
+
+        Args:
+            images: base64 encoded images, in document order
+            resolve: returns the stored base64 image for a content ID, or None if it is gone
+
+        Returns:
+            Unique base64 images to summarize and store
+        """
+        if Image is None:
+            logger.warning("Pillow is not installed; skipping image deduplication")
+            return images
+
+        result: list[str] = []
+        batch: dict[str, str] = {}  # content ID -> image, for images already in result
+        skipped = merged = reused = 0
+        for image in images:
+            try:
+                with Image.open(io.BytesIO(base64.b64decode(image))) as decoded:
+                    if min(decoded.size) < settings.image_min_side:
+                        skipped += 1
+                        continue
+                    ahash, dhash = average_hash(decoded), difference_hash(decoded)
+            except (binascii.Error, OSError, ValueError) as e:
+                logger.warning(f"Could not hash image, keeping it as is: {e}")
+                result.append(image)
+                continue
+
+            canonical = self._match(ahash, dhash, batch, resolve)
+            if canonical is None:
+                canonical = image
+                self.add(cache_manager.generate_content_id(image), ahash, dhash)
+
+            content_id = cache_manager.generate_content_id(canonical)
+            if content_id in batch:
+                merged += 1
+                continue
+            if canonical is not image:
+                reused += 1
+            batch[content_id] = canonical
+            result.append(canonical)
+
+        self._save_index()
+        logger.info(f"Image dedup: {len(images)} images -> {len(result)} unique "
+                    f"({merged} merged within batch, {reused} matched earlier images, {skipped} too small)")
+        return result
+
+
+# Global image hash index
+image_hash_index = ImageHashIndex(os.path.join("./cache", "image_hashes.json"))
@@ -1,17 +1,48 @@
 """
 LLM (Large Language Model) instance management with singleton pattern
 """
-from typing import Optional, Any
+import time
+from typing import Optional, Any, Union
+import httpx
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_ollama import ChatOllama
+from langchain_ollama import ChatOllama, OllamaEmbeddings
 from .utils import logger
 from .config import settings
+from .hedging import HedgedCaller
+from .hash_embeddings import HashEmbeddings
 import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+class HedgedLLM(Runnable):
+    """Chat model runnable that hedges and fails over across several providers"""
+
+    def __init__(self, caller: HedgedCaller):
+        self.caller = caller
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.caller.call(lambda llm: llm.invoke(input, config, **kwargs))
+
+    def latency_stats(self) -> dict[str, dict[str, Any]]:
+        """Latency histogram and circuit state per provider"""
+        return self.caller.latency_stats()
+
+
+class KeepAliveOllamaEmbeddings(OllamaEmbeddings):
+    """OllamaEmbeddings that passes keep_alive, which langchain-ollama 0.2.1 only supports for chat"""
+
+    keep_alive: Optional[Union[int, str]] = None
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._client.embed(self.model, texts, keep_alive=self.keep_alive)["embeddings"]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return (await self._async_client.embed(self.model, texts, keep_alive=self.keep_alive))["embeddings"]
+
+
 class LLMManager:
     """Singleton manager for LLM instances to avoid costly recreation"""
     
@@ -19,6 +50,8 @@ class LLMManager:
     _lock = threading.Lock()
     _llm_cache: dict[str, Any] = {}
     _embeddings_cache: dict[str, Any] = {}
+    _hedged_cache: dict[str, HedgedLLM] = {}
+    _warmup_timings: dict[str, float] = {}
     
     def __new__(cls):
         if cls._instance is None:
@@ -27,6 +60,18 @@ class LLMManager:
                     cls._instance = super().__new__(cls)
         return cls._instance
     
+    @staticmethod
+    def _http_client_kwargs() -> dict[str, Any]:
+        """httpx client options for pooled keep-alive connections"""
+        return {
+            "limits": httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+            "timeout": settings.http_timeout,
+        }
+
     def get_llm(self, 
                 model_name: str = None, 
                 temperature: float = None,
@@ -60,12 +105,16 @@ class LLMManager:
                     if provider.lower() == "google":
                         self._llm_cache[cache_key] = ChatGoogleGenerativeAI(
                             model=model_name,
-                            temperature=temperature
+                            temperature=temperature,
+                            transport=settings.google_transport
                         )
                     elif provider.lower() == "ollama":
                         self._llm_cache[cache_key] = ChatOllama(
                             model=model_name,
-                            temperature=temperature
+                            temperature=temperature,
+                            base_url=settings.ollama_base_url,
+                            keep_alive=settings.ollama_keep_alive,
+                            client_kwargs=self._http_client_kwargs()
                         )
                     else:
                         raise ValueError(f"Unsupported LLM provider: {provider}")
@@ -75,15 +124,54 @@ class LLMManager:
             
         return self._llm_cache[cache_key]
     
+    def get_hedged_llm(self) -> Any:
+        """
+        Get the answer LLM with hedging and failover across settings.llm_fallback_providers
+
+        Returns:
+            HedgedLLM over the primary and fallback providers, or the plain primary
+            LLM instance when no fallbacks are configured
+        """
+        providers = [settings.provider] + [
+            p for p in settings.llm_fallback_providers if p != settings.provider
+        ]
+        if len(providers) == 1:
+            return self.get_llm()
+
+        cache_key = ",".join(providers)
+        if cache_key not in self._hedged_cache:
+            llms = {provider: self.get_llm(provider=provider) for provider in providers}
+            with self._lock:
+                if cache_key not in self._hedged_cache:
+                    logger.info(f"Creating hedged LLM over providers: {cache_key}")
+                    self._hedged_cache[cache_key] = HedgedLLM(HedgedCaller(
+                        llms,
+                        hedge=settings.llm_hedge_enabled,
+                        hedge_quantile=settings.llm_hedge_quantile,
+                        initial_hedge_delay=settings.llm_hedge_initial_delay,
+                        min_hedge_delay=settings.llm_hedge_min_delay,
+                        failure_threshold=settings.llm_circuit_failure_threshold,
+                        reset_seconds=settings.llm_circuit_reset_seconds,
+                    ))
+        return self._hedged_cache[cache_key]
+
+    def get_latency_stats(self) -> dict[str, dict[str, Any]]:
+        """Per-provider latency histograms of all hedged LLMs"""
+        stats = {}
+        for hedged in self._hedged_cache.values():
+            stats.update(hedged.latency_stats())
+        return stats
+
     def get_embeddings(self, 
                       model_name: str = None,
-                      provider: str = "google") -> Any:
+                      provider: str = None) -> Any:
         """
         Get or create embeddings instance with caching
         
         Args:
             model_name: Name of the embedding model (None to use config default)
-            provider: Embedding provider (currently only 'google')
+            provider: Embedding provider ('google', 'ollama', or 'hash' for deterministic
+                offline embeddings; None to use config default)
             
         Returns:
             Embeddings instance
@@ -91,6 +179,8 @@ class LLMManager:
         # Use config default if not specified
         if model_name is None:
             model_name = settings.embedding_model_name
+        if provider is None:
+            provider = settings.embedding_provider
             
         cache_key = f"{provider}:{model_name}"
         
@@ -101,8 +191,18 @@ class LLMManager:
                     
                     if provider.lower() == "google":
                         self._embeddings_cache[cache_key] = GoogleGenerativeAIEmbeddings(
-                            model=model_name
+                            model=model_name,
+                            transport=settings.google_transport
                         )
+                    elif provider.lower() == "ollama":
+                        self._embeddings_cache[cache_key] = KeepAliveOllamaEmbeddings(
+                            model=model_name,
+                            base_url=settings.ollama_base_url,
+                            keep_alive=settings.ollama_keep_alive,
+                            client_kwargs=self._http_client_kwargs()
+                        )
+                    elif provider.lower() == "hash":
+                        self._embeddings_cache[cache_key] = HashEmbeddings()
                     else:
                         raise ValueError(f"Unsupported embeddings provider: {provider}")
                         
@@ -111,18 +211,64 @@ class LLMManager:
             
         return self._embeddings_cache[cache_key]
     
+    def warm_up(self, llm: bool = True, embeddings: bool = True) -> dict[str, float]:
+        """
+        Open connections and load models with a tiny request per client
+
+        Each client is warmed once per process; failures are logged, not raised,
+        since the real request will surface them.
+
+        Args:
+            llm: Warm the answer LLM and its fallback providers
+            embeddings: Warm the embeddings client
+
+        Returns:
+            Warm-up seconds per client
+        """
+        targets = {}
+        if embeddings:
+            key = f"embeddings:{settings.embedding_provider}"
+            targets[key] = lambda: self.get_embeddings().embed_query("warm-up")
+        if llm:
+            providers = [settings.provider] + [
+                p for p in settings.llm_fallback_providers if p != settings.provider
+            ]
+            for provider in providers:
+                targets[f"llm:{provider}"] = lambda provider=provider: self.get_llm(provider=provider).invoke("Reply with OK.")
+
+        timings = {}
+        for key, request in targets.items():
+            if key in self._warmup_timings:
+                continue
+            start = time.perf_counter()
+            try:
+                request()
+            except Exception as e:
+                logger.warning(f"Warm-up of {key} failed: {e}")
+                continue
+            timings[key] = self._warmup_timings[key] = time.perf_counter() - start
+            logger.info(f"Warmed up {key} in {timings[key]:.2f}s")
+        return timings
+
+    def get_warmup_timings(self) -> dict[str, float]:
+        """Warm-up seconds per client warmed in this process"""
+        return dict(self._warmup_timings)
+
     def clear_cache(self) -> None:
         """Clear all cached instances"""
         with self._lock:
             logger.info("Clearing LLM and embeddings cache")
             self._llm_cache.clear()
             self._embeddings_cache.clear()
+            self._hedged_cache.clear()
+            self._warmup_timings.clear()
     
     def get_cache_info(self) -> dict[str, int]:
         """Get information about cached instances"""
         return {
             "llm_instances": len(self._llm_cache),
-            "embeddings_instances": len(self._embeddings_cache)
+            "embeddings_instances": len(self._embeddings_cache),
+            "hedged_instances": len(self._hedged_cache)
         }
 
 
@@ -1,19 +1,255 @@
 from unstructured.partition.pdf import partition_pdf
+from unstructured.chunking.title import chunk_by_title
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LTTextContainer, LTImage, LTFigure, LTRect, LTLine, LTCurve
+from pypdf import PdfReader, PdfWriter
 from .utils import handle_errors, validate_file_path, logger, DocumentProcessingError
-from .config import settings  
-from typing import Any
+from .config import settings
+from .partition_cache import partition_cache, CachedPartition
+from dataclasses import dataclass, asdict
+from typing import Any, Iterator, Optional
+import os
+import tempfile
+import time
+
+# hi_res 提取参数（表格结构推断 + 图片提取）
+HI_RES_KWARGS: dict[str, Any] = dict(
+    infer_table_structure = True,
+    strategy = 'hi_res',
+    extract_images_in_pdf=True,
+    extract_image_block_types=["Image"],
+    # extract_image_block_output_dir= r"./content/pdf_images"
+    extract_image_block_to_payload=True,
+)
+
+# fast 策略直接读取 PDF 文本层，不做版面模型推理
+FAST_KWARGS: dict[str, Any] = dict(strategy = 'fast')
+
+CHUNKING_KWARGS: dict[str, Any] = dict(
+    max_characters = 6000, #希望每个块不要超过多少字。库会尽量在合适的自然边界进行切分。
+    new_after_n_chars = 10000, #设定一个硬性阈值。
+    combine_text_under_n_chars = 2000, #如果某个块不足 2000 字符，会和相邻块合并。
+)
+
+# partition_pdf 参数；同时作为分区缓存键的一部分
+PARTITION_KWARGS: dict[str, Any] = dict(
+    **HI_RES_KWARGS,
+    chunking_strategy = "by_title",
+    **CHUNKING_KWARGS,
+)
+
+
+@dataclass
+class PageReport:
+    """Cheap per-page inspection result and the strategy chosen for the page"""
+    page_number: int
+    text_chars: int
+    image_count: int
+    ruled_lines: int
+    strategy: str = "hi_res"
+    reason: str = ""
+    # Pages of a run are partitioned in one call, so this is the run's time divided
+    # by its page count rather than a measured per-page time
+    avg_seconds: float = 0.0
+
+
+def _split_elements(elements: list[Any]) -> tuple[list[Any], list[Any], list[str]]:
+    """Split chunked elements into (tables, texts, images)"""
+    #拆分，将提取到的文字、表格、图片分别放入三个列表
+    tables = []
+    text = []
+    images = []
+
+    for e in elements:
+        text.append(e)
+        if hasattr(e, 'metadata') and hasattr(e.metadata, 'orig_elements'):
+            for orig in e.metadata.orig_elements:
+                if "Table" in str(type(orig)):
+                    tables.append(orig)
+                if "Image" in str(type(orig)) and hasattr(orig.metadata, 'image_base64'):
+                    images.append(orig.metadata.image_base64)
+    return tables, text, images
+
+
+def _walk_layout(obj: Any, page: PageReport) -> None:
+    """Accumulate text, image and ruling counts for a pdfminer layout object"""
+    if isinstance(obj, LTTextContainer):
+        page.text_chars += len(obj.get_text().strip())
+        return
+    if isinstance(obj, LTImage):
+        page.image_count += 1
+    elif isinstance(obj, (LTRect, LTLine, LTCurve)):
+        page.ruled_lines += 1
+    elif isinstance(obj, LTFigure):
+        for child in obj:
+            _walk_layout(child, page)
+
+
+def inspect_pages(file_path: str) -> list[PageReport]:
+    """
+    Inspect every page from the PDF text layer and pick a partition strategy
+
+    Pages with embedded images, ruled regions (likely tables) or almost no
+    extractable text (likely scanned) need hi_res; everything else is plain
+    prose and can use the fast strategy.
+
+    Args:
+        file_path: Path to the PDF file
+
+    Returns:
+        One PageReport per page, in page order
+    """
+    pages = []
+    for page_number, layout in enumerate(extract_pages(file_path), start=1):
+        page = PageReport(page_number=page_number, text_chars=0, image_count=0, ruled_lines=0)
+        for obj in layout:
+            _walk_layout(obj, page)
+
+        if page.image_count > 0:
+            page.strategy, page.reason = "hi_res", f"{page.image_count} images"
+        elif page.ruled_lines >= settings.adaptive_min_ruled_lines:
+            page.strategy, page.reason = "hi_res", f"{page.ruled_lines} ruled lines"
+        elif page.text_chars < settings.adaptive_min_text_chars:
+            page.strategy, page.reason = "hi_res", f"sparse text layer ({page.text_chars} chars)"
+        else:
+            page.strategy, page.reason = "fast", "plain text"
+        pages.append(page)
+    return pages
+
+
+def _page_runs(pages: list[PageReport]) -> list[list[PageReport]]:
+    """Group consecutive pages that share a strategy"""
+    runs: list[list[PageReport]] = []
+    for page in pages:
+        if runs and runs[-1][-1].strategy == page.strategy:
+            runs[-1].append(page)
+        else:
+            runs.append([page])
+    return runs
+
+
+def _write_page_range(reader: PdfReader, first_page: int, last_page: int, output_path: str) -> None:
+    """Write pages first_page..last_page (1-based, inclusive) to a new PDF"""
+    writer = PdfWriter()
+    for index in range(first_page - 1, last_page):
+        writer.add_page(reader.pages[index])
+    with open(output_path, 'wb') as f:
+        writer.write(f)
+
+
+def _partition_page_range(file_path: str, reader: PdfReader, first_page: int, last_page: int,
+                          kwargs: dict[str, Any], tmp_dir: str) -> list[Any]:
+    """Run partition_pdf on a page range, keeping the original page numbers"""
+    range_path = os.path.join(tmp_dir, f"pages-{first_page}-{last_page}.pdf")
+    _write_page_range(reader, first_page, last_page, range_path)
+    return partition_pdf(
+        filename = range_path,
+        metadata_filename = file_path,
+        starting_page_number = first_page,
+        **kwargs,
+    )
+
+
+def _partition_runs(file_path: str, reader: PdfReader, pages: list[PageReport], tmp_dir: str) -> list[Any]:
+    """Partition inspected pages run by run with their chosen strategy, recording timings"""
+    elements = []
+    for run in _page_runs(pages):
+        first_page, last_page = run[0].page_number, run[-1].page_number
+        strategy = run[0].strategy
+        kwargs = HI_RES_KWARGS if strategy == "hi_res" else FAST_KWARGS
+
+        start = time.perf_counter()
+        elements.extend(_partition_page_range(file_path, reader, first_page, last_page, kwargs, tmp_dir))
+        elapsed = time.perf_counter() - start
+
+        for page in run:
+            page.avg_seconds = elapsed / len(run)
+        logger.info(f"Pages {first_page}-{last_page}: {strategy} in {elapsed:.2f}s "
+                    f"({', '.join(sorted({p.reason for p in run}))})")
+    return elements
+
+
+def _log_adaptive_summary(pages: list[PageReport]) -> None:
+    """Log page counts and total time per strategy"""
+    hi_res_pages = [p for p in pages if p.strategy == "hi_res"]
+    fast_pages = [p for p in pages if p.strategy == "fast"]
+    logger.info(f"Adaptive partition: {len(fast_pages)} fast pages "
+                f"({sum(p.avg_seconds for p in fast_pages):.2f}s), {len(hi_res_pages)} hi_res pages "
+                f"({sum(p.avg_seconds for p in hi_res_pages):.2f}s)")
+
+
+def _partition_adaptive(file_path: str, report: Optional[list[PageReport]] = None) -> list[Any]:
+    """Partition fast pages with 'fast' and the rest with 'hi_res', then chunk the merged elements"""
+    pages = inspect_pages(file_path)
+    reader = PdfReader(file_path)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        elements = _partition_runs(file_path, reader, pages, tmp_dir)
+
+    _log_adaptive_summary(pages)
+    if report is not None:
+        report.extend(pages)
+
+    return chunk_by_title(elements, **CHUNKING_KWARGS)
+
+
+def _partition_params(strategy: str) -> dict[str, Any]:
+    """Parameters that determine the partition output, used as the cache key"""
+    if strategy == "adaptive":
+        return {
+            "adaptive": True,
+            "min_text_chars": settings.adaptive_min_text_chars,
+            "min_ruled_lines": settings.adaptive_min_ruled_lines,
+            **PARTITION_KWARGS,
+        }
+    return PARTITION_KWARGS
+
+
+def _cached_reports(cached: CachedPartition) -> list[PageReport]:
+    """Page reports saved with a cached partition (empty for hi_res or older entries)"""
+    return [PageReport(**page) for page in cached.manifest.get("pages", [])]
+
+
+def get_cached_partition(file_path: str = None, strategy: str = None) -> Optional[CachedPartition]:
+    """
+    Get a previously cached partition without running layout analysis
+
+    Element lists are loaded lazily, so callers that only need e.g. the
+    texts never deserialize tables or images.
+
+    Args:
+        file_path: Path to the PDF file
+        strategy: 'hi_res' or 'adaptive' (None to use config default)
+
+    Returns:
+        CachedPartition, or None if the file has not been partitioned with the current parameters
+    """
+    if file_path is None:
+        file_path = settings.default_pdf_path
+    if strategy is None:
+        strategy = settings.partition_strategy
+    validate_file_path(file_path)
+    return partition_cache.get(partition_cache.make_key(file_path, _partition_params(strategy)))
+
 
 @handle_errors("PDF document partitioning")
-def partition(file_path: str = None) -> tuple[list[Any], list[Any], list[str]]:
+def partition(file_path: str = None,
+              use_cache: bool = None,
+              strategy: str = None,
+              report: Optional[list[PageReport]] = None) -> tuple[list[Any], list[Any], list[str]]:
     """
     Extract and partition content from PDF document
-    
+
     Args:
         file_path: Path to the PDF file
-        
+        use_cache: Read/write the partition cache (None to use config default)
+        strategy: 'hi_res' for every page, or 'adaptive' to inspect pages first and
+            only run hi_res where tables or figures are likely (None to use config default)
+        report: Optional list that receives one PageReport per page in adaptive mode;
+            on a cache hit it receives the reports saved with the cached partition
+
     Returns:
         Tuple containing (tables, text_elements, images)
-        
+
     Raises:
         DocumentProcessingError: If PDF processing fails
         FileNotFoundError: If file doesn't exist
@@ -21,48 +257,173 @@ def partition(file_path: str = None) -> tuple[list[Any], list[Any], list[str]]:
     # Use default path from settings when not provided
     if file_path is None:
         file_path = settings.default_pdf_path
+    if use_cache is None:
+        use_cache = settings.partition_cache_enabled
+    if strategy is None:
+        strategy = settings.partition_strategy
+    if strategy not in ("hi_res", "adaptive"):
+        raise ValueError(f"Unsupported partition strategy: {strategy}")
 
     # Validate input file
     validate_file_path(file_path)
-    
+
+    params = _partition_params(strategy)
+    cache_key = None
+    if use_cache:
+        cache_key = partition_cache.make_key(file_path, params)
+        cached = partition_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached partition for {file_path}: {cached.manifest.get('counts')}")
+            if report is not None:
+                report.extend(_cached_reports(cached))
+            return cached.as_tuple()
+
+    pages: list[PageReport] = []
     try:
         #提取
-        elements = partition_pdf(
-        filename = file_path,
-        infer_table_structure = True,
-        strategy = 'hi_res',
-        extract_images_in_pdf=True,
-        extract_image_block_types=["Image"],
-        # extract_image_block_output_dir= r"./content/pdf_images"
-        extract_image_block_to_payload=True,
-        chunking_strategy = "by_title",
-        max_characters = 6000, #希望每个块不要超过多少字。库会尽量在合适的自然边界进行切分。
-        new_after_n_chars = 10000, #设定一个硬性阈值。
-        combine_text_under_n_chars = 2000, #如果某个块不足 2000 字符，会和相邻块合并。
-        )
-        
+        if strategy == "adaptive":
+            elements = _partition_adaptive(file_path, pages)
+        else:
+            elements = partition_pdf(filename = file_path, **PARTITION_KWARGS)
+
         if not elements:
             raise DocumentProcessingError(f"No content extracted from PDF: {file_path}")
-        
+
         logger.info(f"Extracted {len(elements)} elements from PDF")
-        
-        #拆分，将提取到的文字、表格、图片分别放入三个列表
-        tables = []
-        text = []
-        images = []
-        
-        for e in elements:
-            text.append(e)
-            if hasattr(e, 'metadata') and hasattr(e.metadata, 'orig_elements'):
-                for orig in e.metadata.orig_elements:
-                    if "Table" in str(type(orig)):
-                        tables.append(orig)
-                    if "Image" in str(type(orig)) and hasattr(orig.metadata, 'image_base64'):
-                        images.append(orig.metadata.image_base64)
-        
+
+        tables, text, images = _split_elements(elements)
+
         logger.info(f"Processed: {len(text)} text elements, {len(tables)} tables, {len(images)} images")
-        return tables, text, images
-        
     except Exception as e:
         raise DocumentProcessingError(f"Failed to process PDF {file_path}: {str(e)}") from e
 
+    if report is not None:
+        report.extend(pages)
+    if cache_key is not None:
+        partition_cache.save(cache_key, tables, text, images, params=params,
+                             pages=[asdict(page) for page in pages])
+    return tables, text, images
+
+
+@handle_errors("PDF document partitioning")
+def _partition_window(file_path: str, reader: PdfReader, first_page: int, last_page: int,
+                      page_plan: Optional[list[PageReport]] = None,
+                      report: Optional[list[PageReport]] = None) -> tuple[list[Any], list[Any], list[str]]:
+    """
+    Partition one page window of a PDF (profiled like a whole-document partition)
+
+    Raises:
+        DocumentProcessingError: If partitioning the window fails
+    """
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if page_plan is not None:
+                pages = page_plan[first_page - 1:last_page]
+                elements = chunk_by_title(
+                    _partition_runs(file_path, reader, pages, tmp_dir), **CHUNKING_KWARGS
+                )
+                if report is not None:
+                    report.extend(pages)
+            else:
+                elements = _partition_page_range(
+                    file_path, reader, first_page, last_page, PARTITION_KWARGS, tmp_dir
+                )
+        return _split_elements(elements)
+    except Exception as e:
+        raise DocumentProcessingError(
+            f"Failed to process pages {first_page}-{last_page} of {file_path}: {str(e)}"
+        ) from e
+
+
+def _page_windows(total_pages: int, window_pages: int, start_window: int = 0) -> list[tuple[int, int]]:
+    """(first_page, last_page) of each window, 1-based and inclusive, from window start_window on"""
+    return [
+        (first_page, min(first_page + window_pages - 1, total_pages))
+        for first_page in range(1 + start_window * window_pages, total_pages + 1, window_pages)
+    ]
+
+
+def iter_partition(file_path: str = None,
+                   window_pages: int = None,
+                   use_cache: bool = None,
+                   strategy: str = None,
+                   report: Optional[list[PageReport]] = None,
+                   start_window: int = 0) -> Iterator[tuple[list[Any], list[Any], list[str]]]:
+    """
+    Partition a PDF in page windows, yielding (tables, texts, images) per window
+
+    Only one window of elements and image payloads is held at a time, so peak
+    memory is bounded by the window size instead of the document size. Chunks
+    never span a window boundary. Each window is cached separately.
+
+    Args:
+        file_path: Path to the PDF file
+        window_pages: Pages per window; 0 partitions the whole document in one batch
+            (None to use config default)
+        use_cache: Read/write the partition cache (None to use config default)
+        strategy: 'hi_res' or 'adaptive' (None to use config default)
+        report: Optional list that receives one PageReport per page in adaptive mode
+            (from the cache for cached windows)
+        start_window: Index of the first window to yield, to resume an interrupted ingest
+
+    Yields:
+        Tuple containing (tables, text_elements, images) for each window
+
+    Raises:
+        DocumentProcessingError: If PDF processing fails
+        FileNotFoundError: If file doesn't exist
+    """
+    if file_path is None:
+        file_path = settings.default_pdf_path
+    if window_pages is None:
+        window_pages = settings.partition_window_pages
+    if use_cache is None:
+        use_cache = settings.partition_cache_enabled
+    if strategy is None:
+        strategy = settings.partition_strategy
+
+    if not window_pages or window_pages <= 0:
+        if start_window == 0:
+            yield partition(file_path, use_cache=use_cache, strategy=strategy, report=report)
+        return
+
+    validate_file_path(file_path)
+    try:
+        reader = PdfReader(file_path)
+        total_pages = len(reader.pages)
+        page_plan = inspect_pages(file_path) if strategy == "adaptive" else None
+    except Exception as e:
+        raise DocumentProcessingError(f"Failed to read PDF {file_path}: {str(e)}") from e
+
+    total_windows = (total_pages + window_pages - 1) // window_pages
+    logger.info(f"Streaming partition of {file_path}: {total_pages} pages in {total_windows} windows of {window_pages}"
+                + (f", resuming at window {start_window + 1}" if start_window else ""))
+
+    windows = _page_windows(total_pages, window_pages, start_window)
+    for window_index, (first_page, last_page) in enumerate(windows, start=start_window + 1):
+        progress = f"Window {window_index}/{total_windows} (pages {first_page}-{last_page})"
+        params = {**_partition_params(strategy), "pages": [first_page, last_page]}
+
+        cache_key = None
+        if use_cache:
+            cache_key = partition_cache.make_key(file_path, params)
+            cached = partition_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"{progress}: using cached partition {cached.manifest.get('counts')}")
+                if report is not None:
+                    report.extend(_cached_reports(cached))
+                yield cached.as_tuple()
+                continue
+
+        start = time.perf_counter()
+        tables, text, images = _partition_window(file_path, reader, first_page, last_page, page_plan, report)
+        logger.info(f"{progress}: {len(text)} text elements, {len(tables)} tables, "
+                    f"{len(images)} images in {time.perf_counter() - start:.2f}s")
+        if cache_key is not None and text:
+            window_plan = page_plan[first_page - 1:last_page] if page_plan is not None else []
+            partition_cache.save(cache_key, tables, text, images, params=params,
+                                 pages=[asdict(page) for page in window_plan])
+        yield tables, text, images
+
+    if page_plan is not None:
+        _log_adaptive_summary(page_plan)
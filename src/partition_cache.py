@@ -0,0 +1,172 @@
+"""
+On-disk cache for partitioned PDF elements keyed by file content hash and partition parameters
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Any, Optional, Union
+from unstructured.staging.base import elements_to_dicts, elements_from_dicts
+from .utils import logger
+from .config import settings
+
+ELEMENT_KINDS = ("tables", "texts", "images")
+
+
+class CachedPartition:
+    """Partition result whose element lists are read from disk only when first accessed"""
+
+    def __init__(self, cache: "PartitionCache", key: str, manifest: dict[str, Any]):
+        self._cache = cache
+        self.key = key
+        self.manifest = manifest
+        self._loaded: dict[str, list[Any]] = {}
+
+    def _get(self, kind: str) -> list[Any]:
+        if kind not in self._loaded:
+            self._loaded[kind] = self._cache.load(self.key, kind)
+        return self._loaded[kind]
+
+    @property
+    def tables(self) -> list[Any]:
+        return self._get("tables")
+
+    @property
+    def texts(self) -> list[Any]:
+        return self._get("texts")
+
+    @property
+    def images(self) -> list[str]:
+        return self._get("images")
+
+    def as_tuple(self) -> tuple[list[Any], list[Any], list[str]]:
+        """Return (tables, texts, images) like partition()"""
+        return self.tables, self.texts, self.images
+
+
+class PartitionCache:
+    """Stores partition output as gzipped JSON, one file per element kind"""
+
+    def __init__(self, cache_dir: str = "./cache/partitions"):
+        self.cache_dir = cache_dir
+
+
+    def make_key(self, file_path: str, params: dict[str, Any]) -> str:
+        """Generate a stable key from the file bytes and the partition parameters"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+
+    def _manifest_path(self, key: str) -> str:
+        return os.path.join(self._entry_dir(key), "manifest.json")
+
+
+    def get(self, key: str) -> Optional[CachedPartition]:
+        """Return a lazily loaded partition for the key, or None on cache miss"""
+        manifest_path = self._manifest_path(key)
+        if not os.path.exists(manifest_path):
+            return None
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Failed to read partition cache manifest {key[:8]}...: {e}")
+            return None
+        return CachedPartition(self, key, manifest)
+
+
+    def load(self, key: str, kind: str) -> list[Any]:
+        """Load one element kind ('tables', 'texts' or 'images') from the cache"""
+        if kind not in ELEMENT_KINDS:
+            raise ValueError(f"Unknown element kind: {kind}")
+        path = os.path.join(self._entry_dir(key), f"{kind}.json.gz")
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        items = data if kind == "images" else elements_from_dicts(data)
+        logger.debug(f"Loaded {len(items)} cached {kind} for partition {key[:8]}...")
+        return items
+
+
+    def save(self, key: str, tables: list[Any], texts: list[Any], images: list[str],
+             params: Optional[dict[str, Any]] = None,
+             pages: Optional[list[dict[str, Any]]] = None) -> None:
+        """
+        Save partition output; the manifest is written last so partial entries are never read
+
+        Args:
+            key: Cache key from make_key
+            tables: Table elements
+            texts: Chunked text elements
+            images: base64 encoded images
+            params: Partition parameters, recorded for inspection
+            pages: Per-page inspection reports, returned again on cache hits
+        """
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        payloads = {
+            "tables": elements_to_dicts(tables),
+            "texts": elements_to_dicts(texts),
+            "images": list(images),
+        }
+        try:
+            for kind, payload in payloads.items():
+                path = os.path.join(entry_dir, f"{kind}.json.gz")
+                tmp_path = f"{path}.tmp"
+                with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                    json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(tmp_path, path)
+
+            manifest = {
+                "params": params or {},
+                "counts": {kind: len(payload) for kind, payload in payloads.items()},
+                "pages": pages or [],
+                "created_at": time.time(),
+            }
+            tmp_path = f"{self._manifest_path(key)}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, default=str)
+            os.replace(tmp_path, self._manifest_path(key))
+            logger.info(f"Cached partition {key[:8]}... ({manifest['counts']})")
+        except (IOError, TypeError, ValueError) as e:
+            logger.error(f"Failed to save partition cache: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+
+    def delete(self, key: str) -> bool:
+        """Delete a cached partition. Returns True if removed."""
+        entry_dir = self._entry_dir(key)
+        if os.path.isdir(entry_dir):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return True
+        return False
+
+
+    def clear_cache(self) -> None:
+        """Clear all cached partitions"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        logger.info("Cleared all cached partitions")
+
+
+    def get_cache_stats(self) -> dict[str, Union[int, bool]]:
+        """Get cache statistics"""
+        if not os.path.isdir(self.cache_dir):
+            return {"total_partitions": 0, "cache_dir_exists": False}
+        entries = [
+            name for name in os.listdir(self.cache_dir)
+            if os.path.exists(self._manifest_path(name))
+        ]
+        return {"total_partitions": len(entries), "cache_dir_exists": True}
+
+
+# Global partition cache instance
+partition_cache = PartitionCache(settings.partition_cache_dir)
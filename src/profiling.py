@@ -0,0 +1,168 @@
+"""
+Opt-in cProfile and tracemalloc profiling of the pipeline stages marked by handle_errors
+
+Enabled by setting MULTIRAG_PROFILE_DIR (or settings.profile_dir). Each
+outermost stage call writes a .prof file (cProfile/pstats) and an .alloc.txt
+report with the top allocations made during the call. Nested stages are part
+of the enclosing stage's profile.
+"""
+import cProfile
+import glob
+import io
+import itertools
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, TextIO
+from .config import settings
+from .utils import logger
+
+_local = threading.local()
+_sequence = itertools.count()
+# tracemalloc is process-wide, so concurrent stages share one tracing session
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def _slug(operation: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', operation.lower()).strip('-')
+
+
+def _start_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0:
+            _tracemalloc_owned = not tracemalloc.is_tracing()
+            if _tracemalloc_owned:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc() -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+
+
+def _write_allocations(path: str, operation: str, wall_seconds: float,
+                       before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, peak: int) -> None:
+    stats = after.compare_to(before, 'lineno')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"# stage: {operation}\n")
+        f.write(f"# wall_seconds: {wall_seconds:.6f}\n")
+        f.write(f"# peak_bytes: {peak}\n")
+        f.write(f"# top {settings.profile_top_allocations} allocations by size growth\n")
+        for stat in stats[:settings.profile_top_allocations]:
+            f.write(f"{stat}\n")
+
+
+@contextmanager
+def profile_stage(operation: str, output_dir: str) -> Iterator[None]:
+    """
+    Profile one pipeline stage and write its reports to output_dir
+
+    Args:
+        operation: Stage name as passed to handle_errors
+        output_dir: Directory for the .prof and .alloc.txt files
+    """
+    depth = getattr(_local, "depth", 0)
+    if depth:
+        # Already inside a profiled stage on this thread
+        _local.depth = depth + 1
+        try:
+            yield
+        finally:
+            _local.depth = depth
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"{_slug(operation)}.{os.getpid()}.{next(_sequence):04d}")
+    _local.depth = 1
+    _start_tracemalloc()
+    before = tracemalloc.take_snapshot()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        wall_seconds = time.perf_counter() - start
+        _local.depth = 0
+        try:
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            profiler.dump_stats(f"{base}.prof")
+            _write_allocations(f"{base}.alloc.txt", operation, wall_seconds, before, after, peak)
+            logger.debug(f"Wrote profile for {operation} to {base}.prof")
+        except OSError as e:
+            logger.warning(f"Failed to write profile for {operation}: {e}")
+        finally:
+            _stop_tracemalloc()
+
+
+def _read_allocation_header(path: str) -> dict[str, str]:
+    header = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.startswith("# ") or ":" not in line:
+                break
+            key, value = line[2:].split(":", 1)
+            header[key.strip()] = value.strip()
+    return header
+
+
+def summarize_profiles(directory: str,
+                       sort: str = "cumulative",
+                       limit: int = 15,
+                       stream: Optional[TextIO] = None) -> dict[str, dict[str, Any]]:
+    """
+    Aggregate the profiles in a directory per stage and print the hottest functions
+
+    Args:
+        directory: Profile directory
+        sort: pstats sort key, e.g. "cumulative", "tottime" or "calls"
+        limit: Functions printed per stage
+        stream: Output stream (defaults to stdout)
+
+    Returns:
+        Per-stage runs, total wall seconds and maximum peak traced bytes
+    """
+    stream = stream or sys.stdout
+    stages: dict[str, dict[str, Any]] = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.alloc.txt"))):
+        header = _read_allocation_header(path)
+        prof_path = path[:-len(".alloc.txt")] + ".prof"
+        if "stage" not in header or not os.path.exists(prof_path):
+            continue
+        stage = stages.setdefault(header["stage"], {"runs": 0, "wall_seconds": 0.0, "peak_bytes": 0, "files": []})
+        stage["runs"] += 1
+        stage["wall_seconds"] += float(header.get("wall_seconds", 0))
+        stage["peak_bytes"] = max(stage["peak_bytes"], int(header.get("peak_bytes", 0)))
+        stage["files"].append(prof_path)
+
+    if not stages:
+        stream.write(f"No profiles found in {directory}\n")
+        return {}
+
+    stream.write(f"{'stage':<32} {'runs':>5} {'wall s':>10} {'peak MiB':>10}\n")
+    for name, stage in sorted(stages.items(), key=lambda item: -item[1]["wall_seconds"]):
+        stream.write(f"{name:<32} {stage['runs']:>5} {stage['wall_seconds']:>10.3f} "
+                     f"{stage['peak_bytes'] / 2**20:>10.2f}\n")
+
+    for name, stage in sorted(stages.items(), key=lambda item: -item[1]["wall_seconds"]):
+        stream.write(f"\n=== {name} ===\n")
+        buffer = io.StringIO()
+        stats = pstats.Stats(*stage.pop("files"), stream=buffer)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        stream.write(buffer.getvalue())
+    return stages
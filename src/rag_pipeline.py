@@ -1,9 +1,15 @@
+import time
 from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from base64 import b64decode
+from operator import itemgetter
+from typing import Any, Optional
 from .vector_store import DocumentManager
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import HumanMessage
 from .llm_manager import llm_manager
+from .hedging import LatencyHistogram
+from .config import settings
+from .tables import element_text, fit_context
 from .utils import handle_errors, logger, RAGError
 
 
@@ -11,10 +17,18 @@ from .utils import handle_errors, logger, RAGError
 class RAG:
     def __init__(self, document_manager: DocumentManager):
         self.document_manager = document_manager
-        self.retriever = self.document_manager.retriever
+        self.retriever = RunnableLambda(
+            lambda inputs: fit_context(self.document_manager.retrieve(inputs["query"], inputs.get("filters")))[0]
+        )
         
-        # Use cached LLM instance
-        self.llm = llm_manager.get_llm()
+        # Use cached LLM instance (hedged across fallback providers when configured)
+        self.llm = llm_manager.get_hedged_llm()
+        if settings.llm_warmup:
+            llm_manager.warm_up(embeddings=False)
+
+        # The first query (connection setup, model load) is reported apart from steady state
+        self.first_query_seconds: Optional[float] = None
+        self.query_latency = LatencyHistogram()
         
         # Initialize chains as None - will be built on first use
         self.chain = None
@@ -40,7 +54,7 @@ class RAG:
         context_text = ""
         if len(docs_by_type["texts"]) > 0:
             for text_e in docs_by_type["texts"]:
-                context_text += text_e.text + "\n"
+                context_text += element_text(text_e) + "\n"
 
         prompt_template = f"""Answer the question based only on the following context, which can include text, tables, and the below image.
         Context: {context_text.strip()}
@@ -65,7 +79,7 @@ class RAG:
             self.chain = (
                 {
                     "context": self.retriever | RunnableLambda(self._parse_docs),
-                    "query": RunnablePassthrough()
+                    "query": itemgetter("query")
                 }
                 | RunnableLambda(self._build_prompt)
                 | self.llm
@@ -75,7 +89,7 @@ class RAG:
             self.chain_with_sources = (
                 {
                     "context": self.retriever | RunnableLambda(self._parse_docs),
-                    "query": RunnablePassthrough()
+                    "query": itemgetter("query")
                 }
                 | RunnablePassthrough().assign(
                     response = (
@@ -87,12 +101,44 @@ class RAG:
             )
 
     @handle_errors("RAG query processing")
-    def call(self, query: str):
+    def call(self, query: str, filters: Optional[dict[str, Any]] = None):
+        """
+        Answer a question from the indexed documents
+
+        Args:
+            query: User question
+            filters: Optional scope, e.g. {"source": "./content/paper.pdf",
+                "content_type": ["text", "table"], "page_range": (3, 5)}
+
+        Returns:
+            Dict with context, query and response
+        """
         if not query.strip():
             raise RAGError("Empty query provided")
             
         self._ensure_chains_built()
-        logger.info(f"Processing query: {query[:50]}...")
+        logger.info(f"Processing query: {query[:50]}..." + (f" (filters: {filters})" if filters else ""))
         
-        result = self.chain_with_sources.invoke(query)
-        return result
\ No newline at end of file
+        start = time.perf_counter()
+        result = self.chain_with_sources.invoke({"query": query, "filters": filters})
+        elapsed = time.perf_counter() - start
+        if self.first_query_seconds is None:
+            self.first_query_seconds = elapsed
+            logger.info(f"First query took {elapsed:.2f}s")
+        else:
+            self.query_latency.record(elapsed)
+        return result
+
+    def latency_report(self) -> dict[str, Any]:
+        """
+        Query latency with the first query separated from steady state
+
+        Returns:
+            Dict with warmup (seconds per client), first_query_seconds and
+            steady_state (histogram snapshot of the later queries)
+        """
+        return {
+            "warmup": llm_manager.get_warmup_timings(),
+            "first_query_seconds": self.first_query_seconds,
+            "steady_state": self.query_latency.snapshot(),
+        }
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Maximal-marginal-relevance re-ranking with per-type quotas over retrieved summaries
+"""
+from typing import Optional, Sequence
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def mmr_select(query_embedding: Sequence[float],
+               candidate_embeddings: Sequence[Sequence[float]],
+               k: int,
+               lambda_mult: float = 0.5,
+               content_types: Optional[Sequence[str]] = None,
+               type_quotas: Optional[dict[str, int]] = None) -> list[int]:
+    """
+    Select a relevant but diverse subset of candidates
+
+    Each step picks the candidate maximizing
+    lambda_mult * sim(query, c) - (1 - lambda_mult) * max(sim(c, selected)).
+    All similarities are computed up front as matrix products.
+
+    Args:
+        query_embedding: Query vector
+        candidate_embeddings: One vector per candidate, in retrieval order
+        k: Number of candidates to select
+        lambda_mult: 1.0 ranks purely by relevance, 0.0 purely by diversity
+        content_types: Content type per candidate, used with type_quotas
+        type_quotas: Maximum number of selected candidates per content type
+
+    Returns:
+        Indexes of selected candidates, in selection order
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    if candidates.ndim != 2 or len(candidates) == 0 or k <= 0:
+        return []
+
+    candidates = _normalize(candidates)
+    query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+
+    available = np.ones(len(candidates), dtype=bool)
+    max_similarity = np.full(len(candidates), -np.inf, dtype=np.float32)
+    types = np.asarray(content_types) if content_types is not None else None
+    quotas = dict(type_quotas or {})
+    if types is not None:
+        for content_type, quota in quotas.items():
+            if quota <= 0:
+                available &= types != content_type
+
+    selected: list[int] = []
+    while len(selected) < k and available.any():
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+
+        selected.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, similarity[best])
+
+        if types is not None and types[best] in quotas:
+            content_type = types[best]
+            quotas[content_type] -= 1
+            if quotas[content_type] <= 0:
+                available &= types != content_type
+    return selected
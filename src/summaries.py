@@ -5,7 +5,11 @@ from dotenv import load_dotenv
 from .llm_manager import llm_manager
 from .utils import handle_errors, logger, validate_file_path
 from .cache_manager import cache_manager
-from typing import Any
+from .config import settings
+from .tables import compact_tables
+from typing import Any, Callable, Optional
+import hashlib
+import json
 import yaml
 
 
@@ -14,8 +18,43 @@ load_dotenv()
 #     model="qwen2.5:7b-instruct",
 #     temperature=0,
 # )
+PROMPT_CONFIG_PATH = 'config/prompt.yml'
+
+IMAGE_PROMPT = """Describe the image in detail. For context,the image is part of a research paper.
+    Be specific about graphs, such as bar plots."""
+
+
+def _load_prompts(prompt_config_path: str = PROMPT_CONFIG_PATH) -> dict[str, str]:
+    """Load the text/table summarization prompts"""
+    with open(prompt_config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)['prompts']
+
+
+def _summary_namespace(kind: str, provider: str, prompt: Any, **extra: Any) -> str:
+    """
+    Register and return the cache namespace for a summarization configuration
+
+    Summaries are only reused when provider, model, temperature and prompt all
+    match, so several configurations can share one cache without serving each
+    other stale results.
+    """
+    params = {
+        "kind": kind,
+        "provider": provider,
+        "model": settings.llm_models[provider],
+        "temperature": settings.llm_temperatures[provider],
+        "prompt_sha256": hashlib.sha256(
+            json.dumps(prompt, sort_keys=True).encode('utf-8')
+        ).hexdigest(),
+        **extra,
+    }
+    namespace = cache_manager.make_namespace(params)
+    cache_manager.register_namespace(namespace, params)
+    return namespace
+
+
 @handle_errors("creating summary chain")
-def create_summary_chain(prompt_config_path: str = 'config/prompt.yml') -> Any:
+def create_summary_chain(prompt_config_path: str = PROMPT_CONFIG_PATH) -> Any:
     """
     Create a summarization chain using cached LLM instance
     
@@ -31,8 +70,7 @@ def create_summary_chain(prompt_config_path: str = 'config/prompt.yml') -> Any:
     # Use cached LLM instance with config defaults
     llm = llm_manager.get_llm()
     
-    with open(prompt_config_path, 'r', encoding='utf-8') as f:
-        prompts = yaml.safe_load(f)['prompts']
+    prompts = _load_prompts(prompt_config_path)
 
     prompts = ChatPromptTemplate.from_messages([
         ('system',prompts['system_prompt']),
@@ -62,8 +100,7 @@ def create_image_summary_chain() -> Any:
     prompts = ChatPromptTemplate.from_messages([
         ("human", [
             {"type": "text",
-             "text": """Describe the image in detail. For context,the image is part of a research paper.
-    Be specific about graphs, such as bar plots."""},
+             "text": IMAGE_PROMPT},
             {"type": "image_url",
              "image_url": {"url": "data:image/jpeg;base64,{image}"}}
         ])
@@ -71,6 +108,103 @@ def create_image_summary_chain() -> Any:
     rag_chain = {"image": RunnablePassthrough()} | prompts | llm | StrOutputParser()
     return rag_chain
 
+def _summarize_with_cache(inputs: list[Any], content_ids: list[str], create_chain: Callable[[], Any],
+                          kind: str, namespace: Optional[str] = None, adopt_legacy: bool = True) -> list[str]:
+    """
+    Summarize inputs, reusing cached summaries by content ID
+
+    Uncached items are claimed in the cache in batches of
+    settings.summary_claim_batch, each claimed just before it is summarized so
+    a batch finishes within the claim TTL. Items another worker is already
+    summarizing are awaited instead of being summarized twice, and taken over
+    only if their claim lapses.
+
+    Args:
+        inputs: chain inputs, one per item
+        content_ids: content IDs, aligned with inputs
+        create_chain: factory for the summarization chain (only called on cache misses)
+        kind: label used in log messages
+        namespace: cache namespace of the summarization configuration
+        adopt_legacy: reuse summaries cached before namespacing (when settings.cache_adopt_legacy
+            is on); off when the input sent to the model has changed since then
+
+    Returns:
+        list of summaries in input order
+    """
+    legacy_ids = content_ids
+    content_ids = [cache_manager.namespaced_id(content_id, namespace) for content_id in content_ids]
+    summaries: list[Optional[str]] = [None] * len(inputs)
+    uncached = []  # Indexes with no cached summary
+
+    # Check cache for each item
+    for i, content_id in enumerate(content_ids):
+        cached_summary = cache_manager.get_summary(content_id)
+
+        # Copy summaries cached before namespacing into the namespace that asks for them;
+        # the legacy entry stays so the old configuration can still be rolled back to
+        if not cached_summary and namespace and adopt_legacy and settings.cache_adopt_legacy:
+            cached_summary = cache_manager.get_summary(legacy_ids[i])
+            if cached_summary:
+                cache_manager.set_summary(content_id, cached_summary)
+
+        if cached_summary:
+            logger.debug(f"Using cached {kind} summary: {content_id[:8]}...")
+            summaries[i] = cached_summary
+        else:
+            uncached.append(i)
+
+    if not uncached:
+        logger.info(f"All {len(inputs)} {kind} summaries found in cache")
+        return summaries
+
+    chain = None
+    batch_size = max(1, settings.summary_claim_batch)
+
+    def process(indexes: list[int]) -> list[int]:
+        """Claim and summarize indexes batch by batch; returns the indexes claimed by another worker"""
+        nonlocal chain
+        in_flight = []
+        for offset in range(0, len(indexes), batch_size):
+            batch = []
+            for i in indexes[offset:offset + batch_size]:
+                (batch if cache_manager.claim(content_ids[i]) else in_flight).append(i)
+            if not batch:
+                continue
+            if chain is None:
+                chain = create_chain()
+            try:
+                new_summaries = chain.batch([inputs[i] for i in batch], config={"max_concurrency": 2})
+                # Fill in new summaries and update cache
+                for i, new_summary in zip(batch, new_summaries):
+                    summaries[i] = new_summary
+                    cache_manager.set_summary(content_ids[i], new_summary)
+            finally:
+                for i in batch:
+                    cache_manager.release(content_ids[i])
+        return in_flight
+
+    # Process uncached items
+    logger.info(f"Summarizing {len(uncached)} new {kind} elements ({len(inputs) - len(uncached)} cached)")
+    in_flight = process(uncached)
+
+    # Collect summaries produced by other workers; take over claims that lapse without a summary.
+    # Items re-claimed by yet another worker go back to waiting.
+    while in_flight:
+        logger.info(f"Waiting for {len(in_flight)} {kind} summaries in progress in another worker")
+        results = cache_manager.wait_for_summaries([content_ids[i] for i in in_flight])
+        abandoned = []
+        for i in in_flight:
+            summary = results[content_ids[i]]
+            if summary is not None:
+                summaries[i] = summary
+            else:
+                abandoned.append(i)
+        if abandoned:
+            logger.warning(f"Taking over {len(abandoned)} {kind} elements whose claims expired")
+        in_flight = process(abandoned)
+
+    return summaries
+
 @handle_errors("image summarization")
 def image_summarize(images: list[str]) -> list[str]:
     """
@@ -85,43 +219,10 @@ def image_summarize(images: list[str]) -> list[str]:
     if not images:
         logger.warning("No images provided for summarization")
         return []
-    
-    summaries = []
-    images_to_process = []
-    cache_keys = []
-    
-    # Check cache for each image
-    for image in images:
-        content_id = cache_manager.generate_content_id(image)
-        cached_summary = cache_manager.get_summary(content_id)
-        
-        if cached_summary:
-            logger.debug(f"Using cached image summary: {content_id[:8]}...")
-            summaries.append(cached_summary)
-            cache_keys.append(None)  # Placeholder for cached items
-        else:
-            summaries.append(None)  # Placeholder for items to process
-            images_to_process.append(image)
-            cache_keys.append(content_id)
-    
-    # Process uncached images
-    if images_to_process:
-        chain = create_image_summary_chain()
-        logger.info(f"Summarizing {len(images_to_process)} new images ({len(images) - len(images_to_process)} cached)")
-        new_summaries = chain.batch(images_to_process, config={"max_concurrency": 2})
-        
-        # Fill in new summaries and update cache
-        new_summary_idx = 0
-        for i, (summary, cache_key) in enumerate(zip(summaries, cache_keys)):
-            if summary is None:  # This was a new image
-                new_summary = new_summaries[new_summary_idx]
-                summaries[i] = new_summary
-                cache_manager.set_summary(cache_key, new_summary)
-                new_summary_idx += 1
-    else:
-        logger.info(f"All {len(images)} image summaries found in cache")
-    
-    return summaries
+
+    content_ids = [cache_manager.generate_content_id(image) for image in images]
+    namespace = _summary_namespace("image", "google", IMAGE_PROMPT)
+    return _summarize_with_cache(images, content_ids, create_image_summary_chain, "image", namespace)
 
 @handle_errors("text summarization")
 def summarize(data: list[Any]) -> list[str]:
@@ -137,43 +238,36 @@ def summarize(data: list[Any]) -> list[str]:
     if not data:
         logger.warning("No data provided for summarization")
         return []
-    
-    summaries = []
-    data_to_process = []
-    cache_keys = []
-    
-    # Check cache for each text element
-    for item in data:
-        # Convert to string if needed for content ID generation
-        content_str = str(item.text) if hasattr(item, 'text') else str(item)
-        content_id = cache_manager.generate_content_id(content_str)
-        cached_summary = cache_manager.get_summary(content_id)
-        
-        if cached_summary:
-            logger.debug(f"Using cached text summary: {content_id[:8]}...")
-            summaries.append(cached_summary)
-            cache_keys.append(None)  # Placeholder for cached items
-        else:
-            summaries.append(None)  # Placeholder for items to process
-            data_to_process.append(item)
-            cache_keys.append(content_id)
-    
-    # Process uncached text elements
-    if data_to_process:
-        chain = create_summary_chain()
-        logger.info(f"Summarizing {len(data_to_process)} new text elements ({len(data) - len(data_to_process)} cached)")
-        new_summaries = chain.batch(data_to_process, config={"max_concurrency": 2})
-        
-        # Fill in new summaries and update cache
-        new_summary_idx = 0
-        for i, (summary, cache_key) in enumerate(zip(summaries, cache_keys)):
-            if summary is None:  # This was a new text element
-                new_summary = new_summaries[new_summary_idx]
-                summaries[i] = new_summary
-                cache_manager.set_summary(cache_key, new_summary)
-                new_summary_idx += 1
-    else:
-        logger.info(f"All {len(data)} text summaries found in cache")
-    
-    return summaries
 
+    # Convert to string if needed for content ID generation
+    content_ids = [
+        cache_manager.generate_content_id(str(item.text) if hasattr(item, 'text') else str(item))
+        for item in data
+    ]
+    namespace = _summary_namespace("text", settings.provider, _load_prompts())
+    return _summarize_with_cache(data, content_ids, create_summary_chain, "text", namespace)
+
+@handle_errors("table summarization")
+def summarize_tables(tables: list[Any]) -> list[str]:
+    """
+    Summarize tables from their compact representation with caching
+
+    The prompt receives the compact markdown/TSV form, while the cache key stays
+    the hash of the original HTML so it matches the table's docstore ID.
+
+    Args:
+        tables: list of unstructured Table elements
+
+    Returns:
+        list of table summaries
+    """
+    if not tables:
+        logger.warning("No tables provided for summarization")
+        return []
+
+    content_ids = [cache_manager.generate_content_id(table.metadata.text_as_html) for table in tables]
+    namespace = _summary_namespace("table", settings.provider, _load_prompts(),
+                                   table_format=settings.table_format)
+    # Legacy table summaries were made from the HTML, not the compact form sent now
+    return _summarize_with_cache(compact_tables(tables), content_ids, create_summary_chain, "table", namespace,
+                                 adopt_legacy=False)
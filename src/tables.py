@@ -0,0 +1,255 @@
+"""
+Compact, token-efficient table representation for summarization and answer context
+"""
+import math
+import re
+from html.parser import HTMLParser
+from typing import Any, Optional, Union
+from .utils import logger
+from .config import settings
+
+TABLE_FORMATS = ("markdown", "tsv", "html")
+
+# Approximate prompt tokens per image for multimodal models
+IMAGE_TOKENS = 258
+
+_NUMERIC_RE = re.compile(r"^[\s(+\-−]*[$€£¥]?\s*\d[\d,.\s]*%?\)?\s*$")
+
+
+class _TableParser(HTMLParser):
+    """Collect cell text per row, remembering which rows are header rows"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: list[list[str]] = []
+        self.header_flags: list[bool] = []
+        self._in_thead = False
+        self._row: Optional[list[str]] = None
+        self._row_is_header = True
+        self._cell: Optional[list[str]] = None
+        self._colspan = 1
+        self._rowspan = 1
+        self._carried: dict[int, tuple[str, int]] = {}  # column -> (text, rows still spanned)
+
+    def _fill_carried(self):
+        """Insert cells spanned down from earlier rows at the current column"""
+        while len(self._row) in self._carried:
+            column = len(self._row)
+            text, remaining = self._carried.pop(column)
+            self._row.append(text)
+            if remaining > 1:
+                self._carried[column] = (text, remaining - 1)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "thead":
+            self._in_thead = True
+        elif tag == "tr":
+            self._row = []
+            self._row_is_header = True
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+            self._colspan = self._rowspan = 1
+            for name, value in attrs:
+                if name == "colspan" and value and value.isdigit():
+                    self._colspan = max(1, int(value))
+                elif name == "rowspan" and value and value.isdigit():
+                    self._rowspan = max(1, int(value))
+            if tag == "td" and not self._in_thead:
+                self._row_is_header = False
+        elif tag == "br" and self._cell is not None:
+            self._cell.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag == "thead":
+            self._in_thead = False
+        elif tag in ("td", "th") and self._cell is not None and self._row is not None:
+            text = " ".join("".join(self._cell).split())
+            # Repeat spanned cells so columns stay aligned
+            self._fill_carried()
+            first_column = len(self._row)
+            self._row.extend([text] * self._colspan)
+            if self._rowspan > 1:
+                for column in range(first_column, first_column + self._colspan):
+                    self._carried[column] = (text, self._rowspan - 1)
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            self._fill_carried()
+            if self._row:
+                self.rows.append(self._row)
+                self.header_flags.append(self._row_is_header)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (~4 characters per token)"""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def _is_numeric(cell: str) -> bool:
+    return bool(cell) and bool(_NUMERIC_RE.match(cell))
+
+
+def parse_html_table(html: str) -> tuple[list[list[str]], int]:
+    """
+    Parse an HTML table into whitespace-collapsed rows
+
+    Args:
+        html: Table HTML, e.g. table.metadata.text_as_html
+
+    Returns:
+        Tuple of (rows, header_row_count). Rows are padded to equal width and
+        empty rows/columns are dropped.
+    """
+    parser = _TableParser()
+    parser.feed(html)
+    parser.close()
+    rows, header_flags = parser.rows, parser.header_flags
+    if not rows:
+        return [], 0
+
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+
+    # Drop columns and rows that carry no data
+    keep_cols = [c for c in range(width) if any(row[c] for row in rows)]
+    kept = [
+        ([row[c] for c in keep_cols], flag)
+        for row, flag in zip(rows, header_flags) if any(row)
+    ]
+    rows = [row for row, _ in kept]
+    header_flags = [flag for _, flag in kept]
+    if not rows:
+        return [], 0
+
+    # Header rows: leading <th>/<thead> rows, otherwise a text-only first row above numeric data
+    header_count = 0
+    while header_count < len(rows) - 1 and header_flags[header_count]:
+        header_count += 1
+    if header_count == 0 and len(rows) > 1:
+        first, rest = rows[0], rows[1:]
+        if all(cell and not _is_numeric(cell) for cell in first) and \
+                any(_is_numeric(cell) for row in rest for cell in row):
+            header_count = 1
+    return rows, header_count
+
+
+def _render_markdown(rows: list[list[str]], header_count: int) -> str:
+    def line(row: list[str]) -> str:
+        return "| " + " | ".join(cell.replace("|", "\\|") for cell in row) + " |"
+
+    if header_count == 0:
+        return "\n".join(line(row) for row in rows)
+    # Multi-row headers are merged column-wise into one header line
+    header = [
+        " / ".join(dict.fromkeys(row[c] for row in rows[:header_count] if row[c]))
+        for c in range(len(rows[0]))
+    ]
+    lines = [line(header), "|" + "|".join("---" for _ in header) + "|"]
+    lines.extend(line(row) for row in rows[header_count:])
+    return "\n".join(lines)
+
+
+def _render_tsv(rows: list[list[str]]) -> str:
+    return "\n".join("\t".join(cell.replace("\t", " ") for cell in row) for row in rows)
+
+
+def _table_html(table: Union[str, Any]) -> Optional[str]:
+    if isinstance(table, str):
+        return table
+    metadata = getattr(table, "metadata", None)
+    return getattr(metadata, "text_as_html", None)
+
+
+def is_table(element: Any) -> bool:
+    """Check whether a docstore element is a table with structured HTML"""
+    return not isinstance(element, str) and bool(_table_html(element))
+
+
+def table_to_compact(table: Union[str, Any], fmt: str = None) -> str:
+    """
+    Convert a table element (or its HTML) to a compact text representation
+
+    Args:
+        table: unstructured Table element or an HTML table string
+        fmt: 'markdown', 'tsv' or 'html' (None to use config default)
+
+    Returns:
+        Compact table text; the original HTML when fmt is 'html' or parsing yields nothing
+    """
+    if fmt is None:
+        fmt = settings.table_format
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(f"Unsupported table format: {fmt}")
+
+    html = _table_html(table)
+    if not html:
+        return str(getattr(table, "text", table))
+    if fmt == "html":
+        return html
+
+    rows, header_count = parse_html_table(html)
+    if not rows:
+        return html
+    if fmt == "tsv":
+        return _render_tsv(rows)
+    return _render_markdown(rows, header_count)
+
+
+def compact_tables(tables: list[Any], fmt: str = None) -> list[str]:
+    """
+    Convert tables to compact form, reporting estimated token savings per table
+
+    Args:
+        tables: list of unstructured Table elements (or HTML strings)
+        fmt: 'markdown', 'tsv' or 'html' (None to use config default)
+
+    Returns:
+        list of compact table strings in input order
+    """
+    compact = []
+    total_before = total_after = 0
+    for i, table in enumerate(tables):
+        text = table_to_compact(table, fmt)
+        before = estimate_tokens(_table_html(table) or text)
+        after = estimate_tokens(text)
+        total_before += before
+        total_after += after
+        saved = (1 - after / before) * 100 if before else 0.0
+        logger.info(f"Table {i + 1}/{len(tables)}: ~{before} -> ~{after} tokens ({saved:.0f}% saved)")
+        compact.append(text)
+
+    if tables:
+        logger.info(f"Compacted {len(tables)} tables: ~{total_before} -> ~{total_after} tokens")
+    return compact
+
+
+def element_text(doc: Any) -> str:
+    """Text a retrieved text or table element contributes to the answer prompt"""
+    return table_to_compact(doc) if is_table(doc) else doc.text
+
+
+def fit_context(docs: list[Any], budget: Optional[int] = None) -> tuple[list[Any], int]:
+    """
+    Keep retrieved documents in rank order while they fit a prompt token budget
+
+    Args:
+        docs: Retrieved text/table elements and base64 images, best first
+        budget: Maximum estimated context tokens (None to use config default, 0 = unlimited)
+
+    Returns:
+        Documents that fit and their estimated token count
+    """
+    if budget is None:
+        budget = settings.context_token_budget
+    kept, tokens = [], 0
+    for doc in docs:
+        cost = IMAGE_TOKENS if isinstance(doc, str) else estimate_tokens(element_text(doc))
+        if budget and tokens + cost > budget:
+            break
+        kept.append(doc)
+        tokens += cost
+    return kept, tokens
@@ -6,6 +6,10 @@ import os
 import sys
 from functools import wraps
 from typing import Any, Callable, Optional
+from .config import settings
+
+# Environment switch for per-stage profiling (overrides settings.profile_dir)
+PROFILE_DIR_ENV = "MULTIRAG_PROFILE_DIR"
 
 # Configure logging
 def setup_logging(level: str = "INFO", log_file: Optional[str] = None) -> logging.Logger:
@@ -47,6 +51,10 @@ def setup_logging(level: str = "INFO", log_file: Optional[str] = None) -> loggin
 # Global logger instance
 logger = setup_logging()
 
+def profile_dir() -> Optional[str]:
+    """Directory for stage profiles, or None when profiling is disabled"""
+    return os.environ.get(PROFILE_DIR_ENV) or settings.profile_dir
+
 def handle_errors(operation: str = "operation"):
     """
     Decorator for handling common errors with logging
@@ -59,7 +67,13 @@ def handle_errors(operation: str = "operation"):
         def wrapper(*args, **kwargs) -> Any:
             try:
                 logger.info(f"Starting {operation}")
-                result = func(*args, **kwargs)
+                output_dir = profile_dir()
+                if output_dir:
+                    from .profiling import profile_stage
+                    with profile_stage(operation, output_dir):
+                        result = func(*args, **kwargs)
+                else:
+                    result = func(*args, **kwargs)
                 logger.info(f"Successfully completed {operation}")
                 return result
             except FileNotFoundError as e:
@@ -127,4 +141,8 @@ class VectorStoreError(MultiRagError):
 
 class RAGError(MultiRagError):
     """Exception raised when RAG operations fail"""
-    pass
\ No newline at end of file
+    pass
+
+class LLMError(MultiRagError):
+    """Exception raised when no LLM provider could answer"""
+    pass
@@ -5,28 +5,197 @@ from langchain.storage import InMemoryStore
 from .llm_manager import llm_manager
 from .utils import handle_errors, logger
 from .cache_manager import cache_manager
+from .config import settings
+from .reranker import mmr_select
 from pathlib import Path
+from typing import Any, Optional
+import json
+import os
 import pickle
+import sqlite3
+import time
+
+CONTENT_TYPES = ("text", "table", "image")
+MAX_SECTION_CHARS = 200
+DEFAULT_PERSIST_DIRECTORY = "./chroma_db"
+
+
+def docstore_path(persist_directory: str) -> str:
+    """Docstore file of an index; the default index keeps its docstore in the working directory"""
+    if os.path.normpath(persist_directory) == os.path.normpath(DEFAULT_PERSIST_DIRECTORY):
+        return "./docstore.pkl"
+    return os.path.join(persist_directory, "docstore.pkl")
+
+
+def _location_metadata(first_page: Optional[int], last_page: Optional[int],
+                       section: Optional[str]) -> dict[str, Any]:
+    """Vector store metadata for a page span and section (Chroma rejects None values)"""
+    metadata: dict[str, Any] = {}
+    if first_page is not None:
+        metadata["page_number"] = first_page
+        metadata["page_end"] = last_page
+    if section:
+        metadata["section"] = section
+    return metadata
+
+
+def _collect_provenance(texts: list[Any]) -> dict[str, dict[str, Any]]:
+    """
+    Page and section metadata per content ID, derived from the chunked text elements
+
+    Chunks carry their original elements in reading order. The heading in effect
+    is carried from element to element and across chunks, so tables and images
+    get the section they appear under, and a chunk gets the section covering
+    most of its text.
+    """
+    provenance: dict[str, dict[str, Any]] = {}
+    section = None
+    for chunk in texts:
+        chunk_metadata = getattr(chunk, 'metadata', None)
+        orig_elements = getattr(chunk_metadata, 'orig_elements', None) or []
+
+        chars_per_section: dict[str, int] = {}
+        media: list[tuple[str, Any, Optional[str]]] = []
+        for orig in orig_elements:
+            if getattr(orig, 'category', None) == "Title" and orig.text.strip():
+                section = orig.text.strip()[:MAX_SECTION_CHARS]
+            if section:
+                chars_per_section[section] = chars_per_section.get(section, 0) + len(orig.text or "")
+
+            page = getattr(orig.metadata, 'page_number', None)
+            if "Table" in str(type(orig)) and getattr(orig.metadata, 'text_as_html', None):
+                media.append((cache_manager.generate_content_id(orig.metadata.text_as_html), page, section))
+            elif "Image" in str(type(orig)) and getattr(orig.metadata, 'image_base64', None):
+                media.append((cache_manager.generate_content_id(orig.metadata.image_base64), page, section))
+
+        pages = [
+            orig.metadata.page_number for orig in orig_elements
+            if getattr(orig.metadata, 'page_number', None) is not None
+        ]
+        if not pages and getattr(chunk_metadata, 'page_number', None) is not None:
+            pages = [chunk_metadata.page_number]
+
+        # Ties go to the earlier heading; a chunk without headings continues the current section
+        chunk_section = max(chars_per_section, key=chars_per_section.get) if chars_per_section else section
+        provenance[cache_manager.generate_content_id(chunk.text)] = _location_metadata(
+            min(pages) if pages else None, max(pages) if pages else None, chunk_section
+        )
+        for content_id, page, media_section in media:
+            provenance[content_id] = _location_metadata(page, page, media_section)
+    return provenance
+
+
+def build_filter(filters: Optional[dict[str, Any]],
+                 documents: Optional[dict[str, list[str]]] = None) -> Optional[dict[str, Any]]:
+    """
+    Translate retrieval filters into a Chroma where clause
+
+    Args:
+        filters: Optional dict with any of
+            source: source document path, or a list of paths
+            content_type: 'text', 'table' or 'image', or a list of them
+            page_range: (first_page, last_page), inclusive; matches content overlapping the range
+            section: exact section title
+        documents: Source document -> content IDs manifest. Source filters are
+            resolved through it, so content shared by several documents matches each
+            of them and deleted documents match nothing. Without it, the source
+            recorded on each row at first insert is matched instead.
+
+    Returns:
+        Chroma where clause, or None when nothing is filtered. A source filter
+        naming no indexed content yields an empty "$in" list (see _matches_nothing).
+    """
+    if not filters:
+        return None
+    unknown = set(filters) - {"source", "content_type", "page_range", "section"}
+    if unknown:
+        raise ValueError(f"Unsupported retrieval filters: {sorted(unknown)}")
+
+    clauses = []
+    for key in ("source", "content_type", "section"):
+        value = filters.get(key)
+        if value is None:
+            continue
+        values = [value] if isinstance(value, str) else list(value)
+        if key == "source":
+            values = [os.path.normpath(v) for v in values]
+            if documents is not None:
+                content_ids = list(dict.fromkeys(cid for v in values for cid in documents.get(v, [])))
+                clauses.append({"doc_id": {"$in": content_ids}})
+                continue
+        clauses.append({key: values[0]} if len(values) == 1 else {key: {"$in": values}})
+
+    page_range = filters.get("page_range")
+    if page_range is not None:
+        first_page, last_page = page_range
+        clauses.append({"page_number": {"$lte": int(last_page)}})
+        clauses.append({"page_end": {"$gte": int(first_page)}})
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _matches_nothing(where: Optional[dict[str, Any]]) -> bool:
+    """Whether a where clause has an empty "$in" list, which Chroma rejects instead of matching nothing"""
+    clauses = where.get("$and", [where]) if where else []
+    return any(
+        isinstance(condition, dict) and condition.get("$in") == []
+        for clause in clauses for condition in clause.values()
+    )
+
+
+def _path_size(path: str) -> int:
+    """Size in bytes of a file, or of all files under a directory"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
 
 class DocumentManager:
-    def __init__(self, persist_directory="./chroma_db"):
+    def __init__(self, persist_directory=DEFAULT_PERSIST_DIRECTORY):
+        self.persist_directory = persist_directory
         self.embeddings = llm_manager.get_embeddings()
+        if settings.llm_warmup:
+            llm_manager.warm_up(llm=False)
         self.vector_store = Chroma(
             collection_name="multirag",
             embedding_function=self.embeddings,
             persist_directory=persist_directory
         )
         self.docstore = InMemoryStore()
-        # Persist original content to a pickle file; keep legacy JSON name as fallback
-        self.docstore_file = "./docstore.pkl"
+        # Persist original content to a pickle file belonging to this index
+        self.docstore_file = docstore_path(persist_directory)
         
         # Load existing docstore data
         self._load_docstore()
+
+        # Per-type document counts, maintained on write so stats() never scans the collection
+        self.stats_file = os.path.join(persist_directory, "index_stats.json")
+        self._type_counts = self._load_stats()
+
+        # Content IDs per source document, so documents can be deleted without
+        # removing content another document shares
+        self.documents_file = os.path.join(persist_directory, "documents.json")
+        self._documents = self._load_documents()
+
+        # Per-source ingest progress, so an interrupted ingest resumes instead of
+        # being mistaken for a finished one
+        self.ingest_state_file = os.path.join(persist_directory, "ingest_state.json")
+        self._ingest_state = self._load_ingest_state()
         
         self.retriever = MultiVectorRetriever(
             vectorstore=self.vector_store,
             docstore=self.docstore,
-            id_key='doc_id'
+            id_key='doc_id',
+            search_kwargs={"k": settings.retrieval_k}
         )
     
     def _load_docstore(self):
@@ -48,18 +217,162 @@ class DocumentManager:
     
     def _save_docstore(self):
         """Save docstore data to pickle file."""
+        tmp_path = f"{self.docstore_file}.tmp"
         try:
             # Get all keys from docstore
             all_keys = list(self.docstore.store.keys()) if hasattr(self.docstore, 'store') else []
-            if all_keys:
-                data = {key: self.docstore.store[key] for key in all_keys}
-                with open(self.docstore_file, 'wb') as f:
-                    pickle.dump(data, f)
-                logger.debug(f"Saved {len(data)} items to docstore ({self.docstore_file})")
+            data = {key: self.docstore.store[key] for key in all_keys}
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(data, f)
+            os.replace(tmp_path, self.docstore_file)
+            logger.debug(f"Saved {len(data)} items to docstore ({self.docstore_file})")
         except Exception as e:
             logger.error(f"Failed to save docstore: {e}")
 
-    def _add_content_type(self, contents: list[str], summaries: list[str], content_type: str) -> int:
+    def _load_documents(self) -> dict[str, list[str]]:
+        """Load the source document -> content IDs manifest"""
+        try:
+            with open(self.documents_file, 'r', encoding='utf-8') as f:
+                documents = json.load(f)
+            return documents if isinstance(documents, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Failed to load document manifest: {e}")
+            return {}
+
+    def _save_documents(self) -> None:
+        """Save the source document -> content IDs manifest"""
+        tmp_path = f"{self.documents_file}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._documents, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.documents_file)
+        except IOError as e:
+            logger.error(f"Failed to save document manifest: {e}")
+
+    def _load_ingest_state(self) -> dict[str, dict[str, Any]]:
+        """Load per-source ingest progress"""
+        try:
+            with open(self.ingest_state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Failed to load ingest state: {e}")
+            return {}
+
+    def _save_ingest_state(self) -> None:
+        """Save per-source ingest progress"""
+        tmp_path = f"{self.ingest_state_file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.ingest_state_file) or ".", exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._ingest_state, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.ingest_state_file)
+        except IOError as e:
+            logger.error(f"Failed to save ingest state: {e}")
+
+    def get_ingest_state(self, source: str) -> Optional[dict[str, Any]]:
+        """
+        Ingest progress of a source document
+
+        Returns:
+            Dict with window_pages, windows_done and complete, or None if never ingested
+        """
+        return self._ingest_state.get(os.path.normpath(source))
+
+    def is_ingest_complete(self, source: str) -> bool:
+        """
+        Whether a source document was fully ingested
+
+        Indexes built before ingest progress was recorded have no state; a source
+        counts as complete there when content is already indexed and the manifest
+        either lists the source or predates source tracking.
+        """
+        state = self.get_ingest_state(source)
+        if state is not None:
+            return bool(state.get("complete"))
+        known = os.path.normpath(source) in self._documents or not self._documents
+        return known and sum(self._type_counts.values()) > 0
+
+    def record_ingest_progress(self, source: str, window_pages: int, windows_done: int,
+                               complete: bool = False) -> None:
+        """
+        Record that the first windows_done page windows of a source are indexed
+
+        Args:
+            source: Source document path
+            window_pages: Pages per window used for the ingest (0 = whole document)
+            windows_done: Number of windows indexed so far
+            complete: Whether every window has been indexed
+        """
+        self._ingest_state[os.path.normpath(source)] = {
+            "window_pages": window_pages,
+            "windows_done": windows_done,
+            "complete": complete,
+            "updated_at": time.time(),
+        }
+        self._save_ingest_state()
+
+    def list_documents(self) -> dict[str, int]:
+        """Ingested source documents and their content counts"""
+        return {source: len(ids) for source, ids in self._documents.items()}
+
+    def _load_stats(self) -> dict[str, int]:
+        """Load per-type counts; rebuild them once if missing or out of sync with the collection"""
+        total = self.vector_store._collection.count()
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                counts = json.load(f).get("content_types", {})
+            if sum(counts.values()) == total:
+                return counts
+            logger.warning("Index stats out of sync with vector store; rebuilding")
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, IOError, AttributeError) as e:
+            logger.warning(f"Failed to load index stats: {e}; rebuilding")
+
+        counts = {content_type: 0 for content_type in CONTENT_TYPES}
+        if total > 0:
+            for content_type in CONTENT_TYPES:
+                ids = self.vector_store.get(where={"content_type": content_type}, include=[]).get('ids', [])
+                counts[content_type] = len(ids)
+        self._save_stats(counts)
+        return counts
+
+    def _save_stats(self, counts: dict[str, int] = None) -> None:
+        """Save per-type counts next to the vector store"""
+        if counts is None:
+            counts = self._type_counts
+        tmp_path = f"{self.stats_file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.stats_file) or ".", exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"content_types": counts}, f, indent=2)
+            os.replace(tmp_path, self.stats_file)
+        except IOError as e:
+            logger.error(f"Failed to save index stats: {e}")
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Index statistics from counters maintained on write (no collection scan)
+
+        Returns:
+            Dict with total_documents, content_types (count per type),
+            docstore_items and cached_summaries
+        """
+        return {
+            "total_documents": sum(self._type_counts.values()),
+            "content_types": dict(self._type_counts),
+            "docstore_items": len(self.docstore.store),
+            "cached_summaries": cache_manager.get_cache_stats()["total_summaries"],
+        }
+
+    def _add_content_type(self, contents: list[str], summaries: list[str], content_type: str,
+                          source: Optional[str] = None,
+                          provenance: Optional[dict[str, dict[str, Any]]] = None) -> int:
         """
         Add content and summaries for a specific content type with deduplication
         
@@ -76,9 +389,14 @@ class DocumentManager:
                 content_id = cache_manager.generate_content_id(content.metadata.text_as_html)
             else:
                 content_id = cache_manager.generate_content_id(content)
-            
-            # Check if this content already exists in vector store
-            existing_docs = self.vector_store.get(where={"content_id": content_id})
+
+            if source is not None:
+                document_ids = self._documents.setdefault(source, [])
+                if content_id not in document_ids:
+                    document_ids.append(content_id)
+
+            # Check if this content already exists in vector store (primary key lookup)
+            existing_docs = self.vector_store.get(ids=[content_id], include=[])
             if existing_docs and len(existing_docs.get('ids', [])) > 0:
                 logger.debug(f"Skipping duplicate {content_type} content: {content_id[:8]}...")
                 continue
@@ -87,49 +405,320 @@ class DocumentManager:
             self.docstore.mset([(content_id, content)])
             
             # Store summary in vector store with metadata
-            summary_doc = Document(
-                page_content=summary,
-                metadata={
-                    "doc_id": content_id,
-                    "content_id": content_id,
-                    "content_type": content_type
-                }
-            )
+            metadata = {
+                "doc_id": content_id,
+                "content_id": content_id,
+                "content_type": content_type
+            }
+            if source is not None:
+                metadata["source"] = source
+            if provenance and content_id in provenance:
+                metadata.update(provenance[content_id])
+            summary_doc = Document(page_content=summary, metadata=metadata)
             self.vector_store.add_documents([summary_doc], ids=[content_id])
+            self._type_counts[content_type] = self._type_counts.get(content_type, 0) + 1
             added_count += 1
             logger.debug(f"Added new {content_type} document: {content_id[:8]}...")
         
         return added_count
 
     @handle_errors("document storage")
-    def add_documents(self, texts, text_summaries, tables, table_summaries, images, image_summaries):
-        """Add documents with deduplication based on content hashing"""
-        
+    def add_documents(self, texts, text_summaries, tables, table_summaries, images, image_summaries,
+                      source: Optional[str] = None):
+        """Add documents with deduplication based on content hashing
+
+        Args:
+            source: Source document path, recorded so the document can later be deleted
+        """
+        if source is not None:
+            source = os.path.normpath(source)
+
         logger.info(f"Input counts - texts: {len(texts)}, tables: {len(tables)}, images: {len(images)}")
         logger.info(f"Summary counts - text_summaries: {len(text_summaries)}, table_summaries: {len(table_summaries)}, image_summaries: {len(image_summaries)}")
         
         # Add each content type with deduplication
-        text_added = self._add_content_type(texts, text_summaries, "text")
-        table_added = self._add_content_type(tables, table_summaries, "table") 
-        image_added = self._add_content_type(images, image_summaries, "image")
+        # Page and section metadata for scoped retrieval
+        provenance = _collect_provenance(texts)
+
+        text_added = self._add_content_type(texts, text_summaries, "text", source, provenance)
+        table_added = self._add_content_type(tables, table_summaries, "table", source, provenance)
+        image_added = self._add_content_type(images, image_summaries, "image", source, provenance)
         
         total_added = text_added + table_added + image_added
         logger.info(f"Added {total_added} new documents (texts: {text_added}, tables: {table_added}, images: {image_added})")
         
-        # Save docstore after adding documents
+        # Save docstore and counters after adding documents
         if total_added > 0:
             self._save_docstore()
-        
-        # Debug: Check total documents in vector store
+            self._save_stats()
+        if source is not None:
+            self._save_documents()
+
+        logger.info(f"Total documents in vector store: {self.stats()['total_documents']}")
+
+    def _delete_vectors(self, ids: list[str]) -> int:
+        """Delete vector rows, keeping per-type counts in step. Returns the number removed."""
+        if not ids:
+            return 0
+        existing = self.vector_store.get(ids=ids, include=["metadatas"])
+        for metadata in existing.get('metadatas', []):
+            content_type = (metadata or {}).get("content_type")
+            if self._type_counts.get(content_type, 0) > 0:
+                self._type_counts[content_type] -= 1
+        if existing.get('ids'):
+            self.vector_store.delete(ids=existing['ids'])
+        return len(existing.get('ids', []))
+
+    def _delete_content(self, content_ids: list[str]) -> dict[str, int]:
+        """Delete content IDs from the vector store, docstore and summary cache"""
+        content_ids = list(content_ids)
+        if not content_ids:
+            return {"vectors": 0, "docstore": 0, "summaries": 0}
+
+        removed_vectors = self._delete_vectors(content_ids)
+
+        in_docstore = [key for key in content_ids if key in self.docstore.store]
+        self.docstore.mdelete(in_docstore)
+
+        targets = set(content_ids)
+        summary_keys = [
+            key for key in cache_manager.keys()
+            if cache_manager.split_namespaced_id(key)[1] in targets
+        ]
+        removed_summaries = cache_manager.delete_summaries(summary_keys)
+
+        self._save_docstore()
+        self._save_stats()
+        return {"vectors": removed_vectors, "docstore": len(in_docstore), "summaries": removed_summaries}
+
+    @handle_errors("document deletion")
+    def delete_document(self, source: str) -> dict[str, int]:
+        """
+        Delete a source document's content from all stores
+
+        Content that another ingested document shares is kept.
+
+        Args:
+            source: Source document path as passed to add_documents
+
+        Returns:
+            Number of vectors, docstore entries and summaries removed
+        """
+        source = os.path.normpath(source)
+        if source not in self._documents:
+            logger.warning(f"Document not found in index: {source}")
+            return {"vectors": 0, "docstore": 0, "summaries": 0}
+
+        content_ids = self._documents.pop(source)
+        shared = set().union(*self._documents.values()) if self._documents else set()
+        removed = self._delete_content([cid for cid in content_ids if cid not in shared])
+        self._save_documents()
+        if self._ingest_state.pop(source, None) is not None:
+            self._save_ingest_state()
+
+        logger.info(f"Deleted document {source}: {removed} ({len(content_ids) - removed['vectors']} shared or missing)")
+        return removed
+
+    def _find_unreachable(self, prune_cache: bool = False) -> tuple[set[str], dict[str, list[str]]]:
+        """Find vector rows, docstore entries and summaries not reachable from an indexed document
+
+        The summary cache is shared with other indexes and with ingests still in flight, so
+        only summaries of content this index holds or recorded count as unreachable, unless
+        prune_cache asks for every cache entry this index cannot reach.
+
+        Args:
+            prune_cache: Treat the whole summary cache as belonging to this index
+
+        Returns:
+            Tuple of (reachable content IDs, unreachable keys per store)
+        """
+        rows = self.vector_store.get(include=["metadatas"])
+        owned = set().union(*self._documents.values()) if self._documents else set()
+
+        reachable = set()
+        for content_id, metadata in zip(rows.get('ids', []), rows.get('metadatas', [])):
+            metadata = metadata or {}
+            doc_id = metadata.get("doc_id", content_id)
+            # Rows ingested before sources were recorded have no owner and are kept
+            has_owner = content_id in owned or "source" not in metadata
+            if has_owner and doc_id in self.docstore.store:
+                reachable.add(content_id)
+
+        vectors = [content_id for content_id in rows.get('ids', []) if content_id not in reachable]
+        docstore = [key for key in self.docstore.store if key not in reachable]
+        dropped = (owned | set(rows.get('ids', [])) | set(self.docstore.store)) - reachable
+        summaries = [
+            key for key in cache_manager.keys()
+            if (split_id := cache_manager.split_namespaced_id(key)[1]) not in reachable
+            and (prune_cache or split_id in dropped)
+        ]
+        return reachable, {"vectors": vectors, "docstore": docstore, "summaries": summaries}
+
+    def _store_paths(self) -> list[str]:
+        """Existing files and directories holding this index, each counted once"""
+        cache_file = cache_manager.cache_file
+        candidates = [self.persist_directory, self.docstore_file,
+                      cache_file, f"{cache_file}-wal", f"{cache_file}-shm"]
+        persist_root = os.path.realpath(self.persist_directory)
+
+        paths, seen = [], set()
+        for path in candidates:
+            real = os.path.realpath(path)
+            # Files inside the persist directory are already counted with it
+            nested = real != persist_root and real.startswith(persist_root + os.sep)
+            if real in seen or nested or not os.path.exists(path):
+                continue
+            seen.add(real)
+            paths.append(path)
+        return paths
+
+    def _vacuum_vector_store(self) -> None:
+        """Reclaim free pages in Chroma's SQLite file (best effort)"""
+        db_path = os.path.join(self.persist_directory, "chroma.sqlite3")
+        if not os.path.exists(db_path):
+            return
         try:
-            all_docs = self.vector_store.get()
-            logger.info(f"Total documents in vector store: {len(all_docs.get('ids', []))}")
-        except Exception as e:
-            logger.warning(f"Could not get vector store count: {e}")
+            conn = sqlite3.connect(db_path, timeout=30)
+            try:
+                conn.execute("VACUUM")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not compact vector store: {e}")
+
+    @handle_errors("garbage collection")
+    def gc(self, dry_run: bool = False, prune_cache: bool = False) -> dict[str, Any]:
+        """
+        Delete content unreachable from any indexed document and compact the stores
+
+        A vector row is reachable when its source document is still indexed (or it
+        predates source tracking) and its original content is in the docstore.
+        Docstore entries whose content ID is not reachable are orphans, and so are
+        summaries of content this index held or recorded but can no longer reach.
+
+        Args:
+            dry_run: Only report what would be deleted
+            prune_cache: Also delete cached summaries of content no index here refers to,
+                including ones other indexes sharing the cache may still need
+
+        Returns:
+            Orphan counts per store and bytes before/after/reclaimed
+        """
+        bytes_before = sum(_path_size(path) for path in self._store_paths())
+        reachable, orphans = self._find_unreachable(prune_cache)
+        report: dict[str, Any] = {
+            "dry_run": dry_run,
+            "orphan_vectors": len(orphans["vectors"]),
+            "orphan_docstore": len(orphans["docstore"]),
+            "orphan_summaries": len(orphans["summaries"]),
+            "bytes_before": bytes_before,
+        }
+        logger.info(f"Found {report['orphan_vectors']} orphan vectors, {report['orphan_docstore']} "
+                    f"orphan docstore entries, {report['orphan_summaries']} orphan summaries")
+        if dry_run:
+            return report
+
+        self._delete_vectors(orphans["vectors"])
+        self.docstore.mdelete(orphans["docstore"])
+        cache_manager.delete_summaries(orphans["summaries"])
+
+        # Drop manifest entries for content that no longer exists
+        self._documents = {
+            source: [cid for cid in ids if cid in reachable]
+            for source, ids in self._documents.items()
+        }
+
+        # Compaction: rewrite docstore and manifests, vacuum SQLite files
+        self._save_docstore()
+        self._save_stats()
+        self._save_documents()
+        cache_manager.compact()
+        self._vacuum_vector_store()
+
+        bytes_after = sum(_path_size(path) for path in self._store_paths())
+        report["bytes_after"] = bytes_after
+        report["bytes_reclaimed"] = bytes_before - bytes_after
+        logger.info(f"Garbage collection reclaimed {report['bytes_reclaimed']} bytes")
+        return report
+
+    def _rerank_doc_ids(self, query: str, where: Optional[dict[str, Any]] = None) -> list[str]:
+        """Over-fetch candidate summaries, then keep a diverse subset with MMR and type quotas"""
+        start = time.perf_counter()
+        query_embedding = self.embeddings.embed_query(query)
+        embedded = time.perf_counter()
+
+        candidates = self.vector_store._collection.query(
+            query_embeddings=[query_embedding],
+            n_results=settings.rerank_fetch_k,
+            where=where,
+            include=["embeddings", "metadatas"]
+        )
+        ids = candidates["ids"][0]
+        metadatas = candidates["metadatas"][0]
+        searched = time.perf_counter()
+
+        selected = mmr_select(
+            query_embedding,
+            candidates["embeddings"][0],
+            k=settings.retrieval_k,
+            lambda_mult=settings.rerank_lambda,
+            content_types=[m.get("content_type", "") for m in metadatas],
+            type_quotas=settings.rerank_type_quotas
+        )
+        doc_ids = [metadatas[i].get("doc_id", ids[i]) for i in selected]
+        done = time.perf_counter()
+
+        logger.info(f"Re-ranked {len(ids)} candidates to {len(doc_ids)} in {(done - start) * 1000:.1f}ms "
+                    f"(embed {(embedded - start) * 1000:.1f}ms, search {(searched - embedded) * 1000:.1f}ms, "
+                    f"mmr {(done - searched) * 1000:.1f}ms)")
+        return doc_ids
+
+    def retrieve_with_ids(self, query: str,
+                          filters: Optional[dict[str, Any]] = None) -> tuple[list[str], list[Any]]:
+        """
+        Retrieve original content for a query along with its content IDs
+
+        IDs come from the doc_id metadata of the matched summaries, i.e. the keys
+        the content was stored under, so they can be compared with golden IDs.
+
+        Args:
+            query: User question
+            filters: Optional source/content_type/page_range/section filters (see build_filter),
+                applied inside the vector search
+
+        Returns:
+            Tuple of (content IDs, original content), aligned and best first
+        """
+        where = build_filter(filters, self._documents)
+        if _matches_nothing(where):
+            logger.info(f"No indexed content matches filters {filters}")
+            return [], []
+        if settings.rerank_enabled:
+            doc_ids = self._rerank_doc_ids(query, where)
+        else:
+            # Same as MultiVectorRetriever, with the filter pushed down into the search
+            summaries = self.vector_store.similarity_search(query, k=settings.retrieval_k, filter=where)
+            doc_ids = list(dict.fromkeys(doc.metadata["doc_id"] for doc in summaries))
+        found = [(doc_id, doc) for doc_id, doc in zip(doc_ids, self.docstore.mget(doc_ids)) if doc is not None]
+        return [doc_id for doc_id, _ in found], [doc for _, doc in found]
+
+    def retrieve(self, query: str, filters: Optional[dict[str, Any]] = None) -> list[Any]:
+        """
+        Retrieve original content for a query, re-ranked for diversity when enabled
+
+        Args:
+            query: User question
+            filters: Optional source/content_type/page_range/section filters (see build_filter),
+                applied inside the vector search
+
+        Returns:
+            Original content (text chunks, tables, base64 images)
+        """
+        return self.retrieve_with_ids(query, filters)[1]
 
     @handle_errors("document retrieval")
-    def call(self,query):
-        result = self.retriever.invoke(query)
+    def call(self, query, filters: Optional[dict[str, Any]] = None):
+        result = self.retrieve(query, filters)
         logger.info(f"Retrieved {len(result)} documents")
         return result
 
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Simple test script for index bundle export/import
+"""
+import base64
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+# Add parent directory to path so we can import src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("numpy")
+
+import src.bundle as bundle_module
+from src.bundle import export_bundle, import_bundle, restore_vector_store, IndexBundle
+from src.config import settings
+from src.utils import VectorStoreError
+
+
+class FakeCollection:
+    """In-memory stand-in for a Chroma collection"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def count(self):
+        return len(self.rows)
+
+    def get(self, ids=None, limit=None, offset=0, include=()):
+        keys = [k for k in self.rows if ids is None or k in ids]
+        if limit is not None:
+            keys = keys[offset:offset + limit]
+        return {
+            "ids": keys,
+            "embeddings": [self.rows[k][0] for k in keys],
+            "documents": [self.rows[k][1] for k in keys],
+            "metadatas": [self.rows[k][2] for k in keys],
+        }
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        for row in zip(ids, embeddings, documents, metadatas):
+            self.rows[row[0]] = row[1:]
+
+
+class FakeDocstore:
+    def __init__(self):
+        self.store = {}
+
+    def mset(self, items):
+        self.store.update(items)
+
+
+class FakeManager:
+    def __init__(self):
+        self.vector_store = type("VectorStore", (), {"_collection": FakeCollection()})()
+        self.docstore = FakeDocstore()
+        self._documents = {}
+        self._ingest_state = {}
+        self._type_counts = {"text": 0, "table": 0, "image": 0}
+
+    def _save_stats(self):
+        pass
+
+    def _save_docstore(self):
+        pass
+
+    def _save_documents(self):
+        pass
+
+    def _save_ingest_state(self):
+        pass
+
+
+def make_source():
+    manager = FakeManager()
+    image = base64.b64encode(b"\x89PNG fake image bytes").decode('ascii')
+    manager.vector_store._collection.upsert(
+        ids=["v1", "v2"],
+        embeddings=[[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]],
+        documents=["text summary", "image summary"],
+        metadatas=[{"doc_id": "t1", "content_type": "text"}, {"doc_id": "i1", "content_type": "image"}],
+    )
+    manager.docstore.mset([("t1", {"text": "original"}), ("i1", image)])
+    manager._documents = {"doc.pdf": ["t1", "i1"]}
+    manager._ingest_state = {"doc.pdf": {"window_pages": 0, "windows_done": 1, "complete": True}}
+    return manager, image
+
+
+def test_bundle_round_trip():
+    """Test that a bundle restores vectors, docstore, images and manifest"""
+    print("Testing bundle round trip...")
+
+    source, image = make_source()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bundle")
+        manifest = export_bundle(source, path)
+        assert manifest["count"] == 2 and manifest["dim"] == 3
+        assert manifest["sections"]["vectors"]["offset"] % 64 == 0
+
+        target = FakeManager()
+        loaded = import_bundle(target, path)
+        print(f"Loaded: {loaded}")
+
+        assert loaded == {"vectors": 2, "docstore": 1, "images": 1}
+        rows = target.vector_store._collection.rows
+        assert rows["v2"][1] == "image summary"
+        assert rows["v1"][0] == pytest.approx([0.1, 0.2, 0.3])
+        assert target.docstore.store == {"t1": {"text": "original"}, "i1": image}
+        assert target._documents == {"doc.pdf": ["t1", "i1"]}
+        assert target._ingest_state["doc.pdf"]["complete"]
+        assert target._type_counts == {"text": 1, "table": 0, "image": 1}
+
+        # Importing again does not double-count
+        import_bundle(target, path)
+        assert target._type_counts == {"text": 1, "table": 0, "image": 1}
+
+    print("✅ Bundle round trip test passed!")
+
+
+def test_bundle_checksum():
+    """Test that a corrupted section is rejected"""
+    print("\nTesting bundle checksum...")
+
+    source, _ = make_source()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bundle")
+        manifest = export_bundle(source, path)
+
+        with open(path, 'r+b') as f:
+            f.seek(manifest["sections"]["records"]["offset"])
+            f.write(b"X")
+
+        with pytest.raises(VectorStoreError):
+            IndexBundle(path)
+        with IndexBundle(path, verify=False) as bundle:
+            assert bundle.vectors.shape == (2, 3)
+
+    print("✅ Bundle checksum test passed!")
+
+
+def test_bundle_close_releases_map():
+    """Test that reading sections leaves no views on the memory map, so close() unmaps it"""
+    print("\nTesting bundle close...")
+
+    source, image = make_source()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bundle")
+        export_bundle(source, path)
+
+        bundle = IndexBundle(path)
+        images = bundle.images()
+        elements = bundle.docstore_elements()
+        assert bundle.records()["ids"] == ["v1", "v2"]
+        assert bundle.documents() == {"doc.pdf": ["t1", "i1"]}
+        bundle.close()
+
+        assert bundle._mm.closed
+        assert images == {"i1": image} and elements == {"t1": {"text": "original"}}
+
+    print("✅ Bundle close test passed!")
+
+
+def test_bundle_restores_chroma_files(monkeypatch):
+    """Test that Chroma's database and segment files are restored instead of re-inserting vectors"""
+    print("\nTesting Chroma file restore...")
+
+    monkeypatch.setattr(bundle_module, "_chroma_version", lambda: "0.5.20")
+    source, image = make_source()
+    with tempfile.TemporaryDirectory() as tmp:
+        source.persist_directory = os.path.join(tmp, "source")
+        os.makedirs(os.path.join(source.persist_directory, "segment"))
+        with open(os.path.join(source.persist_directory, "segment", "data_level0.bin"), 'wb') as f:
+            f.write(b"\x01" * 100)
+        with open(os.path.join(source.persist_directory, "documents.json"), 'w') as f:
+            f.write("{}")  # the index's own files travel in their own sections
+        db = sqlite3.connect(os.path.join(source.persist_directory, "chroma.sqlite3"))
+        db.execute("CREATE TABLE embeddings (id TEXT)")
+        db.executemany("INSERT INTO embeddings VALUES (?)", [("v1",), ("v2",)])
+        db.commit()
+
+        path = os.path.join(tmp, "index.bundle")
+        manifest = export_bundle(source, path)
+        db.close()
+        assert manifest["chroma_version"] == "0.5.20"
+        with IndexBundle(path) as bundle:
+            assert [name for name, _, _ in bundle.chroma_files()] == ["segment/data_level0.bin", "chroma.sqlite3"]
+
+        target_dir = os.path.join(tmp, "target")
+        assert restore_vector_store(path, target_dir)
+        with open(os.path.join(target_dir, "segment", "data_level0.bin"), 'rb') as f:
+            assert f.read() == b"\x01" * 100
+        restored = sqlite3.connect(os.path.join(target_dir, "chroma.sqlite3"))
+        assert restored.execute("SELECT id FROM embeddings ORDER BY id").fetchall() == [("v1",), ("v2",)]
+        restored.close()
+        assert not os.path.exists(os.path.join(target_dir, "documents.json"))
+
+        # A directory that already holds a vector store, or another chromadb version, falls back to upserts
+        assert not restore_vector_store(path, target_dir)
+        monkeypatch.setattr(bundle_module, "_chroma_version", lambda: "0.6.0")
+        assert not restore_vector_store(path, os.path.join(tmp, "other"))
+
+        # Stands in for Chroma opening the restored files
+        target = FakeManager()
+        target.vector_store._collection.rows = dict(source.vector_store._collection.rows)
+        loaded = import_bundle(target, path, vectors_restored=True)
+        assert loaded == {"vectors": 2, "docstore": 1, "images": 1}
+        assert target._type_counts == {"text": 1, "table": 0, "image": 1}
+        assert target.docstore.store == {"t1": {"text": "original"}, "i1": image}
+
+        with pytest.raises(VectorStoreError):
+            import_bundle(FakeManager(), path, vectors_restored=True)
+
+    print("✅ Chroma file restore test passed!")
+
+
+def test_bundle_embedding_provider(monkeypatch):
+    """Test that bundles built with another embedding provider are rejected"""
+    print("\nTesting embedding provider check...")
+
+    source, _ = make_source()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bundle")
+        manifest = export_bundle(source, path)
+        assert manifest["embedding_provider"] == settings.embedding_provider
+
+        monkeypatch.setattr(settings, "embedding_provider", "hash")
+        with pytest.raises(VectorStoreError):
+            import_bundle(FakeManager(), path)
+        with pytest.raises(VectorStoreError):
+            restore_vector_store(path, os.path.join(tmp, "target"))
+
+    print("✅ Embedding provider test passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running bundle tests...\n")
+    pytest.main([__file__, "-v", "-s"])
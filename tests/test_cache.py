@@ -4,11 +4,13 @@ Simple test script for the caching system
 """
 import os
 import sys
+import tempfile
+import time
 
 # Add parent directory to path so we can import src
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.cache_manager import cache_manager
+from src.cache_manager import cache_manager, CacheManager, SQLiteCacheManager
 from src.utils import logger
 
 def test_cache_manager():
@@ -79,6 +81,146 @@ def test_cache_persistence():
     else:
         print("❌ Cache persistence test failed!")
 
+def test_sqlite_shared_cache():
+    """Test that two SQLite-backed managers (as in two workers) see each other's entries"""
+    print("\nTesting shared SQLite cache...")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        worker_a = SQLiteCacheManager(cache_dir)
+        worker_b = SQLiteCacheManager(cache_dir)
+
+        content_id = worker_a.generate_content_id("Shared content")
+        assert worker_b.get_summary(content_id) is None
+
+        worker_a.set_summary(content_id, "Shared summary")
+        assert worker_b.get_summary(content_id) == "Shared summary"  # read-through on miss
+
+        other_id = worker_a.generate_content_id("Other content")
+        worker_b.set_summary(other_id, "Other summary")
+        assert worker_a.get_cache_stats()["total_summaries"] == 2
+
+    print("✅ Shared SQLite cache test passed!")
+
+def test_sqlite_sees_other_workers_changes():
+    """Test that deletes and overwrites by another worker are seen, not served from memory"""
+    print("\nTesting cross-worker visibility...")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        worker_a = SQLiteCacheManager(cache_dir)
+        worker_b = SQLiteCacheManager(cache_dir)
+        kept, deleted = worker_a.generate_content_id("kept"), worker_a.generate_content_id("deleted")
+        worker_a.set_summary(kept, "Old summary")
+        worker_a.set_summary(deleted, "Doomed summary")
+        assert worker_b.get_summary(kept) == "Old summary"
+        assert worker_b.get_summary(deleted) == "Doomed summary"
+
+        worker_a.set_summary(kept, "New summary")
+        worker_a.delete_summaries([deleted])
+        assert worker_b.get_summary(kept) == "New summary"
+        assert worker_b.get_summary(deleted) is None
+        assert not worker_b.has_summary(deleted)
+
+    print("✅ Cross-worker visibility test passed!")
+
+def test_claims():
+    """Test that only one worker can claim a content ID at a time"""
+    print("\nTesting in-flight claims...")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        worker_a = SQLiteCacheManager(cache_dir)
+        worker_b = SQLiteCacheManager(cache_dir)
+        content_id = worker_a.generate_content_id("Claimed content")
+
+        assert worker_a.claim(content_id)
+        assert not worker_b.claim(content_id)
+        worker_a.release(content_id)
+        assert worker_b.claim(content_id)
+
+        # Expired claims can be taken over
+        worker_b.claim_ttl = 0
+        assert worker_b.claim(content_id)
+        assert worker_a.claim(content_id)
+
+        json_cache = CacheManager(cache_dir)
+        assert json_cache.claim(content_id)
+        assert not json_cache.claim(content_id)
+
+    print("✅ Claim test passed!")
+
+def test_wait_for_summaries():
+    """Test that in-flight summaries are awaited together until their claims lapse"""
+    print("\nTesting waiting for in-flight summaries...")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        worker_a = SQLiteCacheManager(cache_dir, claim_ttl=0.5)
+        worker_b = SQLiteCacheManager(cache_dir)
+        ids = [worker_a.generate_content_id(f"Content {n}") for n in range(4)]
+
+        for content_id in ids:
+            assert worker_a.claim(content_id)
+        assert worker_b.claim_expiry(ids[0]) > time.time()
+        worker_a.set_summary(ids[0], "Done")
+        worker_a.release(ids[1])
+
+        start = time.time()
+        results = worker_b.wait_for_summaries(ids, poll_interval=0.05)
+        elapsed = time.time() - start
+        print(f"Waited {elapsed:.2f}s for {len(ids)} claims")
+
+        assert results == {ids[0]: "Done", ids[1]: None, ids[2]: None, ids[3]: None}
+        assert elapsed < 1.0  # one shared wait, not one TTL per item
+        assert worker_b.claim_expiry(ids[1]) is None
+
+    print("✅ Wait for summaries test passed!")
+
+def test_sqlite_imports_json_cache():
+    """Test that the SQLite backend starts from an existing summaries.json"""
+    print("\nTesting JSON import...")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        json_cache = CacheManager(cache_dir)
+        json_cache.set_summary("abc", "Imported summary")
+
+        sqlite_cache = SQLiteCacheManager(cache_dir)
+        assert sqlite_cache.get_summary("abc") == "Imported summary"
+
+    print("✅ JSON import test passed!")
+
+def test_namespaces():
+    """Test that configurations get separate namespaces that can be listed and pruned"""
+    print("\nTesting cache namespaces...")
+
+    for manager_cls in (CacheManager, SQLiteCacheManager):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = manager_cls(cache_dir)
+            content_id = cache.generate_content_id("Namespaced content")
+
+            google = cache.make_namespace({"provider": "google", "model": "gemini-2.5-flash-lite"})
+            ollama = cache.make_namespace({"provider": "ollama", "model": "llama3.1:8b"})
+            assert google != ollama
+            assert cache.make_namespace({"model": "gemini-2.5-flash-lite", "provider": "google"}) == google
+
+            cache.register_namespace(google, {"provider": "google"})
+            cache.register_namespace(ollama, {"provider": "ollama"})
+            cache.set_summary(cache.namespaced_id(content_id, google), "Google summary")
+            cache.set_summary(cache.namespaced_id(content_id, ollama), "Ollama summary")
+            cache.set_summary(content_id, "Legacy summary")
+
+            assert cache.get_summary(cache.namespaced_id(content_id, google)) == "Google summary"
+            entries = {info["namespace"]: info["entries"] for info in cache.list_namespaces()}
+            assert entries == {google: 1, ollama: 1, "": 1}
+
+            assert cache.prune_namespaces(max_entries=1, keep=(google,), dry_run=True)
+            removed = cache.prune_namespaces(max_entries=2, keep=(google,))
+            assert len(removed) == 1 and google not in removed
+            assert cache.get_summary(cache.namespaced_id(content_id, google)) == "Google summary"
+            assert cache.get_cache_stats()["total_summaries"] == 2
+
+            cache.prune_namespaces(max_age_days=0, keep=(google,))
+            assert [info["namespace"] for info in cache.list_namespaces()] == [google]
+
+    print("✅ Namespace test passed!")
+
 if __name__ == "__main__":
     print("🧪 Running cache system tests...\n")
     
@@ -86,6 +228,12 @@ if __name__ == "__main__":
         test_cache_manager()
         test_content_id_stability() 
         test_cache_persistence()
+        test_sqlite_shared_cache()
+        test_sqlite_sees_other_workers_changes()
+        test_claims()
+        test_wait_for_summaries()
+        test_sqlite_imports_json_cache()
+        test_namespaces()
         
         print("\n🎉 All cache tests completed!")
         
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Simple test script for the retrieval evaluation metrics
+"""
+import json
+import os
+import pickle
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path so we can import src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.evaluation import recall_at_k, reciprocal_rank, percentile, build_sweep, load_golden_set, evaluate
+from src.tables import fit_context, IMAGE_TOKENS
+from src.cache_manager import cache_manager
+from src.config import settings
+
+
+def test_ranking_metrics():
+    """Test recall@k, reciprocal rank and percentiles"""
+    print("Testing ranking metrics...")
+
+    retrieved = ["a", "b", "c", "d"]
+    assert recall_at_k(retrieved, ["b", "x"]) == 0.5
+    assert recall_at_k(retrieved, ["c", "d"], k=2) == 0.0
+    assert recall_at_k(retrieved, []) == 0.0
+    assert reciprocal_rank(retrieved, ["c", "b"]) == 0.5
+    assert reciprocal_rank(retrieved, ["x"]) == 0.0
+    assert percentile([5, 1, 3, 2, 4], 0.5) == 3
+    assert percentile([5, 1, 3, 2, 4], 0.95) == 5
+    assert percentile([], 0.5) is None
+
+    print("✅ Ranking metrics test passed!")
+
+
+def test_empty_golden_set():
+    """Test that an empty golden set is rejected instead of dividing by zero"""
+    print("\nTesting empty golden set...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, content in (("golden.json", "[]"), ("golden.jsonl", "\n\n")):
+            path = os.path.join(tmp, name)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            with pytest.raises(ValueError, match="no queries"):
+                load_golden_set(path)
+
+    with pytest.raises(ValueError, match="no queries"):
+        evaluate(None, [], build_sweep([4]))
+
+    print("✅ Empty golden set test passed!")
+
+
+def test_sweep_and_context_budget():
+    """Test sweep expansion and context budget trimming"""
+    print("\nTesting sweep and context budget...")
+
+    configs = build_sweep([2, 8], [0, 4], [0, 100])
+    print(f"Configs: {[c.label for c in configs]}")
+    # fetch_k=4 is below k=8, so that combination is skipped
+    assert len(configs) == 6
+    assert all(not c.fetch_k or c.fetch_k >= c.k for c in configs)
+
+    text = SimpleNamespace(text="x" * 400, metadata=SimpleNamespace(text_as_html=None))
+    image = "aW1hZ2U="
+    kept, tokens = fit_context([text, image, text], budget=100 + IMAGE_TOKENS)
+    assert kept == [text, image] and tokens == 100 + IMAGE_TOKENS
+    assert len(fit_context([text, image, text], budget=0)[0]) == 3
+
+    print("✅ Sweep and context budget test passed!")
+
+
+def test_offline_index():
+    """Test that the offline copy uses the source index's docstore and stored IDs, and restores settings"""
+    print("\nTesting offline evaluation index...")
+    chromadb = pytest.importorskip("chromadb")
+    pytest.importorskip("langchain_chroma")
+    from src.evaluation import build_offline_index
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_dir, target_dir = os.path.join(tmp, "source"), os.path.join(tmp, "target")
+        # A table chunk stored as text is keyed by the hash of its text, not its HTML
+        table_chunk = SimpleNamespace(text="BLEU scores of ByteNet and Transformer",
+                                      metadata=SimpleNamespace(text_as_html="<table><tr><td>28.4</td></tr></table>"))
+        other = SimpleNamespace(text="Attention weights", metadata=SimpleNamespace(text_as_html=None))
+        table_id = cache_manager.generate_content_id(table_chunk.text)
+        other_id = cache_manager.generate_content_id(other.text)
+
+        collection = chromadb.PersistentClient(path=source_dir).get_or_create_collection("multirag")
+        collection.add(ids=[table_id, other_id], embeddings=[[0.0, 1.0], [1.0, 0.0]],
+                       documents=["BLEU scores table", "Attention weights summary"],
+                       metadatas=[{"doc_id": table_id, "content_type": "text"},
+                                  {"doc_id": other_id, "content_type": "text"}])
+        with open(os.path.join(source_dir, "docstore.pkl"), 'wb') as f:
+            pickle.dump({table_id: table_chunk, other_id: other}, f)
+        with open(os.path.join(source_dir, "documents.json"), 'w', encoding='utf-8') as f:
+            json.dump({"paper.pdf": [table_id, other_id]}, f)
+
+        provider = settings.embedding_provider
+        manager = build_offline_index(source_dir, target_dir)
+        assert settings.embedding_provider == provider
+        assert manager.docstore_file == os.path.join(target_dir, "docstore.pkl")
+
+        ids, docs = manager.retrieve_with_ids("BLEU scores", {"source": "paper.pdf"})
+        print(f"Retrieved: {ids}")
+        assert ids[0] == table_id and docs[0].text == table_chunk.text
+        assert set(ids) == {table_id, other_id}
+
+    print("✅ Offline index test passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running evaluation tests...\n")
+
+    test_ranking_metrics()
+    test_empty_golden_set()
+    test_sweep_and_context_budget()
+    test_offline_index()
+
+    print("\n🎉 All evaluation tests completed!")
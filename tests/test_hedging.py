@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Simple test script for LLM hedging, failover and circuit breaking
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path so we can import src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.hedging import HedgedCaller, LatencyHistogram, CircuitBreaker
+from src.utils import LLMError
+
+
+class FakeProvider:
+    """Fake LLM client with controllable latency and failures"""
+
+    def __init__(self, name, latency=0.0, fail=False):
+        self.name = name
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError(f"{self.name} unavailable")
+        return f"{self.name}: {prompt}"
+
+
+def make_caller(primary, secondary, **kwargs):
+    return HedgedCaller({"primary": primary, "secondary": secondary}, **kwargs)
+
+
+def test_fast_primary_is_not_hedged():
+    """Test that a fast primary answers alone"""
+    print("Testing fast primary...")
+
+    primary, secondary = FakeProvider("primary"), FakeProvider("secondary")
+    caller = make_caller(primary, secondary, initial_hedge_delay=0.5)
+
+    assert caller.call(lambda llm: llm.invoke("q")) == "primary: q"
+    assert secondary.calls == 0
+
+    print("✅ Fast primary test passed!")
+
+
+def test_slow_primary_is_hedged():
+    """Test that a slow primary is hedged and the faster provider wins"""
+    print("\nTesting hedging...")
+
+    primary, secondary = FakeProvider("primary", latency=1.0), FakeProvider("secondary", latency=0.01)
+    caller = make_caller(primary, secondary, initial_hedge_delay=0.05)
+
+    start = time.perf_counter()
+    result = caller.call(lambda llm: llm.invoke("q"))
+    elapsed = time.perf_counter() - start
+    print(f"Result: {result} in {elapsed:.3f}s")
+
+    assert result == "secondary: q"
+    assert elapsed < 0.5
+
+    print("✅ Hedging test passed!")
+
+
+def test_failover_and_circuit_breaker():
+    """Test failover on errors and that a failing provider is skipped once its circuit opens"""
+    print("\nTesting failover and circuit breaker...")
+
+    primary, secondary = FakeProvider("primary", fail=True), FakeProvider("secondary")
+    caller = make_caller(primary, secondary, failure_threshold=2, reset_seconds=60)
+
+    for _ in range(3):
+        assert caller.call(lambda llm: llm.invoke("q")) == "secondary: q"
+
+    assert primary.calls == 2  # Circuit opened after two failures
+    assert caller.latency_stats()["primary"]["circuit"] == "open"
+    assert caller.latency_stats()["secondary"]["count"] == 3
+
+    secondary.fail = True
+    try:
+        caller.call(lambda llm: llm.invoke("q"))
+        assert False, "Expected LLMError"
+    except LLMError:
+        pass
+
+    print("✅ Failover test passed!")
+
+
+def test_hedge_delay_follows_failover():
+    """Test that after failing over, hedging waits on the latency of the provider now called"""
+    print("\nTesting hedge delay after failover...")
+
+    providers = {
+        "a": FakeProvider("a", fail=True),
+        "b": FakeProvider("b", latency=1.0),
+        "c": FakeProvider("c", latency=0.01),
+    }
+    caller = HedgedCaller(providers, min_samples=3, min_hedge_delay=0.05)
+    for _ in range(3):
+        caller.histograms["a"].record(5.0)  # slow history on the failed provider
+        caller.histograms["b"].record(0.05)
+
+    start = time.perf_counter()
+    result = caller.call(lambda llm: llm.invoke("q"))
+    elapsed = time.perf_counter() - start
+    print(f"Result: {result} in {elapsed:.3f}s")
+
+    assert result == "c: q"
+    assert elapsed < 0.8  # hedged after b's p95, not a's
+
+    print("✅ Hedge delay after failover test passed!")
+
+
+def test_half_open_allows_one_trial():
+    """Test that a half-open circuit lets a single trial call through at a time"""
+    print("\nTesting half-open trial calls...")
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()  # trial already in flight
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow() and breaker.allow()
+
+    # Concurrent calls: only one reaches the recovering primary
+    primary, secondary = FakeProvider("primary", fail=True), FakeProvider("secondary", latency=0.01)
+    caller = make_caller(primary, secondary, hedge=False, failure_threshold=1, reset_seconds=0.05)
+    assert caller.call(lambda llm: llm.invoke("q")) == "secondary: q"
+    time.sleep(0.06)
+    primary.fail, primary.latency = False, 0.3
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: caller.call(lambda llm: llm.invoke("q")), range(4)))
+    print(f"Results: {results}")
+
+    assert primary.calls == 2  # the failure plus one trial
+    assert results.count("primary: q") == 1 and results.count("secondary: q") == 3
+    assert caller.latency_stats()["primary"]["circuit"] == "closed"
+
+    print("✅ Half-open trial test passed!")
+
+
+def test_latency_histogram():
+    """Test quantiles and bucket counts"""
+    print("\nTesting latency histogram...")
+
+    histogram = LatencyHistogram()
+    for seconds in (0.01, 0.2, 0.3, 0.4, 3.0):
+        histogram.record(seconds)
+
+    snapshot = histogram.snapshot()
+    print(f"Snapshot: {snapshot}")
+    assert snapshot["count"] == 5
+    assert histogram.quantile(0.5) == 0.3
+    assert histogram.quantile(0.95) == 3.0
+    assert snapshot["buckets"]["0.05"] == 1 and snapshot["buckets"]["5"] == 1
+
+    print("✅ Latency histogram test passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running hedging tests...\n")
+
+    test_fast_primary_is_not_hedged()
+    test_slow_primary_is_hedged()
+    test_failover_and_circuit_breaker()
+    test_hedge_delay_follows_failover()
+    test_half_open_allows_one_trial()
+    test_latency_histogram()
+
+    print("\n🎉 All hedging tests completed!")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Simple test script for perceptual-hash image deduplication
+"""
+import base64
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Add parent directory to path so we can import src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.image_dedup import ImageHashIndex, hamming_distance
+
+
+def make_image(shift=0, size=64, quality=90):
+    """Gradient test image as base64 JPEG"""
+    from PIL import Image
+    image = Image.new("L", (size, size))
+    image.putdata([((x + shift) * 4 + y) % 256 for y in range(size) for x in range(size)])
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=quality)
+    return base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def test_hamming_distance():
+    """Test bit distance between hashes"""
+    print("Testing Hamming distance...")
+
+    assert hamming_distance(0b1011, 0b1011) == 0
+    assert hamming_distance(0b1011, 0b0010) == 2
+    assert hamming_distance(0, 2**64 - 1) == 64
+
+    print("✅ Hamming distance test passed!")
+
+
+def test_dedupe_images():
+    """Test near-duplicate merging, tiny image skipping and cross-run reuse"""
+    print("\nTesting image dedup...")
+    pytest.importorskip("PIL")
+
+    original = make_image(quality=90)
+    reencoded = make_image(quality=60)
+    different = make_image(shift=16)
+    icon = make_image(size=8)
+    assert original != reencoded
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ImageHashIndex(os.path.join(tmp, "image_hashes.json"))
+        unique = index.dedupe([original, reencoded, icon, different], resolve=lambda cid: None)
+        print(f"First batch: {len(unique)} unique images")
+        assert unique == [original, different]
+
+        # A later run maps the re-encoded copy to the stored original
+        store = {}
+        from src.cache_manager import cache_manager
+        for image in unique:
+            store[cache_manager.generate_content_id(image)] = image
+        reloaded = ImageHashIndex(os.path.join(tmp, "image_hashes.json"))
+        assert len(reloaded) == 2
+        assert reloaded.dedupe([reencoded], resolve=store.get) == [original]
+
+    print("✅ Image dedup test passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running image dedup tests...\n")
+
+    test_hamming_distance()
+    test_dedupe_images()
+
+    print("\n🎉 All image dedup tests completed!")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Simple test script for pooled keep-alive LLM/embedding clients and warm-up,
+run against a local stub Ollama server
+"""
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add parent directory to path so we can import src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("langchain_ollama")
+pytest.importorskip("langchain_google_genai")
+
+from src.config import settings
+from src.llm_manager import llm_manager
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/chat and /api/embed, recording each request's client port"""
+
+    protocol_version = "HTTP/1.1"  # keep connections open between requests
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.path, self.client_address[1], body))
+        if self.path == "/api/chat":
+            payload = json.dumps({
+                "model": body["model"], "created_at": "2024-01-01T00:00:00Z",
+                "message": {"role": "assistant", "content": "OK"},
+                "done": True, "done_reason": "stop", "prompt_eval_count": 1, "eval_count": 1,
+            }) + "\n"
+        else:
+            payload = json.dumps({"model": body["model"], "embeddings": [[0.1, 0.2, 0.3]]})
+        data = payload.encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    saved = (settings.provider, settings.embedding_provider, settings.embedding_model_name,
+             settings.ollama_base_url, settings.llm_fallback_providers)
+    settings.provider = "ollama"
+    settings.embedding_provider = "ollama"
+    settings.embedding_model_name = "stub-embed"
+    settings.ollama_base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    settings.llm_fallback_providers = []
+    llm_manager.clear_cache()
+    try:
+        yield server
+    finally:
+        (settings.provider, settings.embedding_provider, settings.embedding_model_name,
+         settings.ollama_base_url, settings.llm_fallback_providers) = saved
+        llm_manager.clear_cache()
+        server.shutdown()
+        server.server_close()
+
+
+def test_connections_are_reused(stub_server):
+    """Test that repeated requests share one pooled keep-alive connection and keep the model loaded"""
+    print("Testing connection reuse...")
+
+    llm = llm_manager.get_llm()
+    embeddings = llm_manager.get_embeddings()
+    for _ in range(3):
+        assert llm.invoke("hello").content == "OK"
+        assert embeddings.embed_query("hello") == [0.1, 0.2, 0.3]
+
+    for path in ("/api/chat", "/api/embed"):
+        requests = [r for r in stub_server.requests if r[0] == path]
+        ports = {port for _, port, _ in requests}
+        print(f"{len(requests)} {path} requests over {len(ports)} connection(s)")
+        assert len(requests) == 3 and len(ports) == 1
+        assert requests[0][2]["keep_alive"] == settings.ollama_keep_alive
+
+    print("✅ Connection reuse test passed!")
+
+
+def test_pool_limits_reach_clients(stub_server, monkeypatch):
+    """Test that the configured connection limits are the ones the Ollama clients' pools use"""
+    print("\nTesting pool limits...")
+
+    monkeypatch.setattr(settings, "http_max_connections", 7)
+    monkeypatch.setattr(settings, "http_max_keepalive_connections", 3)
+    monkeypatch.setattr(settings, "http_keepalive_expiry", 12.0)
+
+    for client in (llm_manager.get_llm(), llm_manager.get_embeddings()):
+        for ollama_client in (client._client, client._async_client):
+            pool = ollama_client._client._transport._pool
+            limits = (pool._max_connections, pool._max_keepalive_connections, pool._keepalive_expiry)
+            print(f"{type(client).__name__} {type(ollama_client).__name__}: {limits}")
+            assert limits == (7, 3, 12.0)
+
+    print("✅ Pool limits test passed!")
+
+
+def test_google_transport(monkeypatch):
+    """Test that the configured transport reaches the Google chat and embedding clients"""
+    print("\nTesting Google transport...")
+
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "google_transport", "rest")
+    llm_manager.clear_cache()
+    try:
+        llm = llm_manager.get_llm(provider="google")
+        embeddings = llm_manager.get_embeddings(provider="google")
+        assert llm.transport == "rest" and embeddings.transport == "rest"
+    finally:
+        llm_manager.clear_cache()
+
+    print("✅ Google transport test passed!")
+
+
+def test_warm_up(stub_server):
+    """Test that warm-up hits each client once per process"""
+    print("\nTesting warm-up...")
+
+    timings = llm_manager.warm_up()
+    print(f"Warm-up timings: {timings}")
+    assert set(timings) == {"embeddings:ollama", "llm:ollama"}
+    paths = [path for path, _, _ in stub_server.requests]
+    assert paths.count("/api/chat") == 1 and paths.count("/api/embed") == 1
+
+    # Already warm: no further requests
+    assert llm_manager.warm_up() == {}
+    assert len(stub_server.requests) == 2
+    assert set(llm_manager.get_warmup_timings()) == set(timings)
+
+    print("✅ Warm-up test passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running LLM transport tests...\n")
+    pytest.main([__file__, "-v", "-s"])
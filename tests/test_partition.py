@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Simple test script for page inspection and adaptive partition planning
+"""
+import glob
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Add parent directory to path so we can import src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("unstructured.partition.pdf")
+
+import src.partition as partition_module
+from pypdf import PdfReader
+from src.partition import (inspect_pages, _page_runs, _partition_params, _page_windows, _write_page_range,
+                           PageReport, partition)
+from src.partition_cache import PartitionCache
+from src.profiling import summarize_profiles
+from src.utils import DocumentProcessingError, PROFILE_DIR_ENV
+
+PLAIN = "Plain prose about attention mechanisms and sequence transduction models. " * 4
+
+
+def write_pdf(path, pages):
+    """
+    Write a minimal PDF; each page is (text_lines, ruled_lines)
+
+    Ruled lines are drawn as stroked paths, which pdfminer reports as LTLine.
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines, rules in pages:
+        stream = "BT /F1 10 Tf 50 750 Td 12 TL " + " ".join(f"({line}) '" for line in lines) + " ET\n"
+        stream += "".join(f"50 {400 - i * 10} m 500 {400 - i * 10} l S\n" for i in range(rules))
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}endstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode('latin-1')
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_inspect_pages_strategy():
+    """Test that plain pages get 'fast' and ruled or sparse pages get 'hi_res'"""
+    print("Testing page inspection...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = write_pdf(os.path.join(tmp, "doc.pdf"), [
+            ([PLAIN], 0),          # 1: plain text
+            ([PLAIN], 6),          # 2: ruled lines, likely a table
+            (["Figure 1"], 0),     # 3: sparse text layer
+            ([PLAIN], 0),          # 4: plain text
+        ])
+        pages = inspect_pages(pdf)
+
+    for page in pages:
+        print(f"Page {page.page_number}: {page.strategy} ({page.reason})")
+    assert [p.strategy for p in pages] == ["fast", "hi_res", "hi_res", "fast"]
+    assert pages[1].ruled_lines >= 6 and pages[0].text_chars >= 200
+
+    runs = _page_runs(pages)
+    assert [[p.page_number for p in run] for run in runs] == [[1], [2, 3], [4]]
+
+    print("✅ Page inspection test passed!")
+
+
+def test_cached_partition_keeps_report():
+    """Test that a cache hit returns the page reports saved with the partition"""
+    print("\nTesting page reports on cache hit...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = write_pdf(os.path.join(tmp, "doc.pdf"), [([PLAIN], 0)])
+        cache = PartitionCache(os.path.join(tmp, "partitions"))
+        page = PageReport(1, 300, 0, 0, "fast", "plain text", 0.25)
+        key = cache.make_key(pdf, _partition_params("adaptive"))
+        cache.save(key, [], [], [], pages=[vars(page)])
+
+        saved_cache = partition_module.partition_cache
+        partition_module.partition_cache = cache
+        try:
+            report = []
+            assert partition(pdf, use_cache=True, strategy="adaptive", report=report) == ([], [], [])
+        finally:
+            partition_module.partition_cache = saved_cache
+
+    assert report == [page]
+
+    print("✅ Cached page report test passed!")
+
+
+def test_page_windows():
+    """Test splitting a document into page windows, including resuming mid-document"""
+    print("\nTesting page windows...")
+
+    assert _page_windows(10, 4) == [(1, 4), (5, 8), (9, 10)]
+    assert _page_windows(8, 4) == [(1, 4), (5, 8)]
+    assert _page_windows(3, 5) == [(1, 3)]
+    assert _page_windows(10, 4, start_window=1) == [(5, 8), (9, 10)]
+    assert _page_windows(10, 4, start_window=3) == []
+
+    print("✅ Page windows test passed!")
+
+
+def test_write_page_range():
+    """Test that a page range is written as its own PDF with the right pages"""
+    print("\nTesting page range extraction...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = write_pdf(os.path.join(tmp, "doc.pdf"), [([f"Page {n}"], 0) for n in range(1, 6)])
+        out = os.path.join(tmp, "range.pdf")
+        _write_page_range(PdfReader(pdf), 2, 4, out)
+
+        pages = PdfReader(out).pages
+        texts = [page.extract_text().strip() for page in pages]
+    print(f"Extracted: {texts}")
+    assert texts == ["Page 2", "Page 3", "Page 4"]
+
+    print("✅ Page range test passed!")
+
+
+def test_windowed_partition_is_profiled_and_wrapped(monkeypatch):
+    """Test that each partitioned window is profiled and its failures surface as DocumentProcessingError"""
+    print("\nTesting windowed partition error handling and profiling...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = write_pdf(os.path.join(tmp, "doc.pdf"), [([PLAIN], 0)] * 3)
+        profiles = os.path.join(tmp, "profiles")
+        monkeypatch.setenv(PROFILE_DIR_ENV, profiles)
+        monkeypatch.setattr(partition_module, "partition_pdf", lambda **kwargs: [])
+
+        windows = list(partition_module.iter_partition(pdf, window_pages=2, use_cache=False, strategy="hi_res"))
+        assert windows == [([], [], []), ([], [], [])]
+        stages = summarize_profiles(profiles, stream=io.StringIO())
+        print(f"Profiled stages: { {name: stage['runs'] for name, stage in stages.items()} }")
+        assert stages["PDF document partitioning"]["runs"] == 2
+
+        def fail(**kwargs):
+            raise RuntimeError("layout model crashed")
+
+        monkeypatch.setattr(partition_module, "partition_pdf", fail)
+        with pytest.raises(DocumentProcessingError, match="pages 1-2"):
+            next(partition_module.iter_partition(pdf, window_pages=2, use_cache=False, strategy="hi_res"))
+        assert len(glob.glob(os.path.join(profiles, "*.prof"))) == 3
+
+    print("✅ Windowed partition wrapping test passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running partition tests...\n")
+
+    test_inspect_pages_strategy()
+    test_cached_partition_keeps_report()
+    test_page_windows()
+    test_write_page_range()
+    pytest.main([__file__, "-v", "-s", "-k", "windowed_partition"])
+
+    print("\n🎉 All partition tests completed!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Simple test script for the partition result cache
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Add parent directory to path so we can import src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("unstructured")
+
+from unstructured.documents.elements import Table, Text, ElementMetadata
+from src.partition_cache import PartitionCache
+
+PARAMS = {"strategy": "hi_res", "max_characters": 6000}
+
+
+def write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_cache_key():
+    """Test that the key depends on file bytes and parameters, not the path"""
+    print("Testing partition cache key...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PartitionCache(os.path.join(tmp, "partitions"))
+        a = write_file(os.path.join(tmp, "a.pdf"), b"%PDF-1.4 same bytes")
+        b = write_file(os.path.join(tmp, "b.pdf"), b"%PDF-1.4 same bytes")
+        c = write_file(os.path.join(tmp, "c.pdf"), b"%PDF-1.4 other bytes")
+
+        assert cache.make_key(a, PARAMS) == cache.make_key(b, PARAMS)
+        assert cache.make_key(a, PARAMS) != cache.make_key(c, PARAMS)
+        assert cache.make_key(a, PARAMS) != cache.make_key(a, {**PARAMS, "strategy": "fast"})
+        # Parameter order does not matter
+        assert cache.make_key(a, {"b": 1, "a": 2}) == cache.make_key(a, {"a": 2, "b": 1})
+
+    print("✅ Partition cache key test passed!")
+
+
+def test_save_load_round_trip():
+    """Test that cached elements, images and page reports come back, loaded lazily"""
+    print("\nTesting partition cache round trip...")
+
+    table = Table("a b", metadata=ElementMetadata(text_as_html="<table><tr><td>a</td><td>b</td></tr></table>",
+                                                   page_number=2))
+    text = Text("Attention is all you need", metadata=ElementMetadata(page_number=1))
+    pages = [{"page_number": 1, "text_chars": 500, "image_count": 0, "ruled_lines": 0,
+              "strategy": "fast", "reason": "plain text", "avg_seconds": 0.1}]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PartitionCache(os.path.join(tmp, "partitions"))
+        assert cache.get("missing") is None
+
+        cache.save("key", [table], [text], ["aW1hZ2U="], params=PARAMS, pages=pages)
+        cached = cache.get("key")
+        assert cached.manifest["counts"] == {"tables": 1, "texts": 1, "images": 1}
+        assert cached.manifest["pages"] == pages
+
+        # Nothing is read until an element kind is accessed
+        assert cached._loaded == {}
+        assert cached.texts[0].text == "Attention is all you need"
+        assert set(cached._loaded) == {"texts"}
+
+        # Images were never loaded, so removing their file does not affect texts
+        os.remove(os.path.join(tmp, "partitions", "key", "images.json.gz"))
+        assert cached.texts[0].metadata.page_number == 1
+
+        fresh = cache.get("key")
+        assert fresh.tables[0].metadata.text_as_html == table.metadata.text_as_html
+        assert cache.get_cache_stats() == {"total_partitions": 1, "cache_dir_exists": True}
+        assert cache.delete("key") and cache.get("key") is None
+
+    print("✅ Partition cache round trip test passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running partition cache tests...\n")
+
+    test_cache_key()
+    test_save_load_round_trip()
+
+    print("\n🎉 All partition cache tests completed!")
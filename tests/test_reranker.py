@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Simple test script for MMR re-ranking
+"""
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path so we can import src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("numpy")
+
+from src.reranker import mmr_select
+
+
+QUERY = [1.0, 0.0, 0.0]
+CANDIDATES = [
+    [1.0, 0.05, 0.0],   # 0: most relevant
+    [1.0, 0.06, 0.0],   # 1: near-duplicate of 0
+    [0.8, 0.0, 0.6],    # 2: relevant, different direction
+    [0.7, 0.7, 0.0],    # 3: relevant, different direction
+]
+
+
+def test_mmr_skips_near_duplicates():
+    """Test that a near-duplicate is passed over for a diverse candidate"""
+    print("Testing MMR diversity...")
+
+    by_relevance = mmr_select(QUERY, CANDIDATES, k=2, lambda_mult=1.0)
+    diverse = mmr_select(QUERY, CANDIDATES, k=2, lambda_mult=0.5)
+    print(f"Relevance only: {by_relevance}, MMR: {diverse}")
+
+    assert by_relevance == [0, 1]
+    assert diverse[0] == 0 and 1 not in diverse
+
+    print("✅ MMR diversity test passed!")
+
+
+def test_type_quotas():
+    """Test per-type quotas"""
+    print("\nTesting type quotas...")
+
+    types = ["image", "image", "image", "text"]
+    selected = mmr_select(QUERY, CANDIDATES, k=3, lambda_mult=1.0,
+                          content_types=types, type_quotas={"image": 1})
+    print(f"Selected: {selected}")
+
+    assert selected == [0, 3]
+    assert mmr_select(QUERY, [], k=3) == []
+
+    print("✅ Type quota test passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running re-ranker tests...\n")
+
+    test_mmr_skips_near_duplicates()
+    test_type_quotas()
+
+    print("\n🎉 All re-ranker tests completed!")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Simple test script for claim-coordinated summarization across workers
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+# Add parent directory to path so we can import src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_ollama")
+pytest.importorskip("langchain_google_genai")
+
+import src.summaries as summaries_module
+from src.cache_manager import SQLiteCacheManager
+from src.config import settings
+
+
+class FakeChain:
+    """Summarizes by upper-casing, recording each batch"""
+
+    def __init__(self):
+        self.batches = []
+
+    def batch(self, inputs, config=None):
+        self.batches.append(list(inputs))
+        return [text.upper() for text in inputs]
+
+
+@pytest.fixture
+def worker_caches():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        saved = (summaries_module.cache_manager, settings.summary_claim_batch)
+        this_worker = SQLiteCacheManager(cache_dir, claim_ttl=60)
+        other_worker = SQLiteCacheManager(cache_dir, claim_ttl=0.3)
+        summaries_module.cache_manager = this_worker
+        settings.summary_claim_batch = 2
+        try:
+            yield this_worker, other_worker
+        finally:
+            summaries_module.cache_manager, settings.summary_claim_batch = saved
+
+
+def test_claims_in_batches(worker_caches):
+    """Test that uncached items are claimed and summarized a batch at a time"""
+    print("Testing batched claims...")
+
+    this_worker, _ = worker_caches
+    inputs = [f"text {n}" for n in range(5)]
+    ids = [this_worker.generate_content_id(text) for text in inputs]
+    this_worker.set_summary(ids[0], "CACHED")
+
+    chain = FakeChain()
+    result = summaries_module._summarize_with_cache(inputs, ids, lambda: chain, "text")
+
+    print(f"Batches: {chain.batches}")
+    assert result == ["CACHED", "TEXT 1", "TEXT 2", "TEXT 3", "TEXT 4"]
+    assert chain.batches == [["text 1", "text 2"], ["text 3", "text 4"]]
+    assert all(this_worker.claim_expiry(content_id) is None for content_id in ids)
+
+    print("✅ Batched claim test passed!")
+
+
+def test_waits_for_other_worker(worker_caches):
+    """Test that another worker's items are awaited, and taken over once their claims lapse"""
+    print("\nTesting in-flight items...")
+
+    this_worker, other_worker = worker_caches
+    inputs = ["finished elsewhere", "abandoned elsewhere", "mine"]
+    ids = [this_worker.generate_content_id(text) for text in inputs]
+    assert other_worker.claim(ids[0]) and other_worker.claim(ids[1])
+
+    finisher = threading.Timer(0.1, other_worker.set_summary, (ids[0], "FROM OTHER WORKER"))
+    finisher.start()
+    chain = FakeChain()
+    start = time.time()
+    result = summaries_module._summarize_with_cache(inputs, ids, lambda: chain, "text")
+    finisher.join()
+
+    print(f"Result after {time.time() - start:.2f}s: {result}")
+    assert result == ["FROM OTHER WORKER", "ABANDONED ELSEWHERE", "MINE"]
+    assert chain.batches == [["mine"], ["abandoned elsewhere"]]
+
+    print("✅ In-flight item test passed!")
+
+
+def test_skips_items_reclaimed_by_another_worker(worker_caches, monkeypatch):
+    """Test that a lapsed item re-claimed by someone else is awaited, not summarized again"""
+    print("\nTesting re-claimed items...")
+
+    this_worker, other_worker = worker_caches
+    content_id = this_worker.generate_content_id("contended")
+    assert other_worker.claim(content_id)
+
+    real_claim = this_worker.claim
+    attempts = []
+
+    def claim(cid):
+        attempts.append(cid)
+        if len(attempts) == 2:
+            # A third worker takes over first and finishes the summary
+            other_worker.claim(cid)
+            other_worker.set_summary(cid, "FROM THIRD WORKER")
+        return real_claim(cid)
+
+    monkeypatch.setattr(this_worker, "claim", claim)
+    chain = FakeChain()
+    result = summaries_module._summarize_with_cache(["contended"], [content_id], lambda: chain, "text")
+
+    assert result == ["FROM THIRD WORKER"]
+    assert chain.batches == []
+
+    print("✅ Re-claimed item test passed!")
+
+
+def test_legacy_summaries_copied_except_tables(worker_caches):
+    """Test that legacy text summaries are copied into the namespace and kept, and tables are not adopted"""
+    print("\nTesting legacy summary adoption...")
+
+    this_worker, _ = worker_caches
+    text_id = this_worker.generate_content_id("legacy text")
+    table_id = this_worker.generate_content_id("<table><tr><td>1</td></tr></table>")
+    this_worker.set_summary(text_id, "LEGACY TEXT SUMMARY")
+    this_worker.set_summary(table_id, "LEGACY HTML TABLE SUMMARY")
+
+    chain = FakeChain()
+    texts = summaries_module._summarize_with_cache(["legacy text"], [text_id], lambda: chain, "text", "ns")
+    tables = summaries_module._summarize_with_cache(["| 1 |"], [table_id], lambda: chain, "table", "ns",
+                                                    adopt_legacy=False)
+
+    assert texts == ["LEGACY TEXT SUMMARY"]
+    assert this_worker.get_summary(f"ns:{text_id}") == "LEGACY TEXT SUMMARY"
+    assert this_worker.get_summary(text_id) == "LEGACY TEXT SUMMARY"  # kept for rollback
+    assert tables == ["| 1 |"]  # summarized afresh from the compact form
+    assert this_worker.get_summary(table_id) == "LEGACY HTML TABLE SUMMARY"
+    assert chain.batches == [["| 1 |"]]
+
+    print("✅ Legacy adoption test passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running summarization tests...\n")
+    pytest.main([__file__, "-v", "-s"])
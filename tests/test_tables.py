@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Simple test script for compact table representation
+"""
+import os
+import sys
+
+# Add parent directory to path so we can import src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tables import parse_html_table, table_to_compact, compact_tables, estimate_tokens
+
+TABLE_HTML = (
+    "<table><thead><tr><th>Layer  Type</th><th>Complexity per Layer</th><th></th></tr></thead>"
+    "<tbody><tr><td>Self-Attention</td><td>O(n2 · d)</td><td></td></tr>"
+    "<tr><td>Recurrent</td><td>O(n · d2)</td><td></td></tr></tbody></table>"
+)
+
+
+class FakeMetadata:
+    def __init__(self, text_as_html):
+        self.text_as_html = text_as_html
+
+
+class FakeTable:
+    def __init__(self, text_as_html):
+        self.text = "plain table text"
+        self.metadata = FakeMetadata(text_as_html)
+
+
+def test_parse_html_table():
+    """Test header detection, whitespace collapse and empty column removal"""
+    print("Testing parse_html_table...")
+
+    rows, header_count = parse_html_table(TABLE_HTML)
+    print(f"Rows: {rows}, header rows: {header_count}")
+
+    assert header_count == 1
+    assert rows[0] == ["Layer Type", "Complexity per Layer"]
+    assert all(len(row) == 2 for row in rows)
+
+    print("✅ parse_html_table test passed!")
+
+
+def test_spanned_cells():
+    """Test that rowspan and colspan cells are repeated into the cells they cover"""
+    print("\nTesting spanned cells...")
+
+    html = "<table><tr><td rowspan=2>X</td><td>1</td></tr><tr><td>2</td></tr></table>"
+    rows, _ = parse_html_table(html)
+    print(f"Rows: {rows}")
+    assert rows == [["X", "1"], ["X", "2"]]
+
+    html = ("<table><tr><td>A</td><td rowspan=3 colspan=2>S</td><td>1</td></tr>"
+            "<tr><td>B</td><td>2</td></tr><tr><td>C</td></tr></table>")
+    rows, _ = parse_html_table(html)
+    print(f"Rows: {rows}")
+    assert rows == [["A", "S", "S", "1"], ["B", "S", "S", "2"], ["C", "S", "S", ""]]
+
+    print("✅ Spanned cells test passed!")
+
+
+def test_header_heuristic():
+    """Test that a text-only first row above numeric data is treated as header"""
+    print("\nTesting header heuristic...")
+
+    html = "<table><tr><td>Model</td><td>BLEU</td></tr><tr><td>ByteNet</td><td>23.75</td></tr></table>"
+    markdown = table_to_compact(html, "markdown")
+    print(markdown)
+
+    assert markdown.splitlines()[1] == "|---|---|"
+    print("✅ Header heuristic test passed!")
+
+
+def test_formats_and_savings():
+    """Test markdown/TSV/HTML output and token savings"""
+    print("\nTesting table formats...")
+
+    table = FakeTable(TABLE_HTML)
+    markdown = table_to_compact(table, "markdown")
+    tsv = table_to_compact(table, "tsv")
+
+    assert table_to_compact(table, "html") == TABLE_HTML
+    assert tsv.splitlines()[1] == "Self-Attention\tO(n2 · d)"
+    assert estimate_tokens(markdown) < estimate_tokens(TABLE_HTML)
+    assert compact_tables([table], "tsv") == [tsv]
+
+    print("✅ Table format test passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running table tests...\n")
+
+    test_parse_html_table()
+    test_spanned_cells()
+    test_header_heuristic()
+    test_formats_and_savings()
+
+    print("\n🎉 All table tests completed!")